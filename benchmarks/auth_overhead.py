@@ -0,0 +1,120 @@
+"""Bearer-token work per request on a route guarded by `RoleChecker`.
+
+Such a route evaluates two `AccessTokenBearer` instances: its own
+``token_info`` dependency and the one behind `get_current_user`. The
+previous `TokenBearer.__call__` decoded the JWT twice per instance and
+checked the Redis blocklist once per instance; `authenticate` now does both
+once per request. Blocklist lookups go to an in-memory Redis with a
+simulated round trip; the last flow also keeps the local copy of
+revocations that `TokenRevocations` maintains over pub/sub.
+"""
+
+import asyncio
+import uuid
+
+from fastapi import HTTPException, Request
+from fastapi.security import HTTPBearer
+
+from src.auth import dependencies, revocations, utils
+from src.auth.dependencies import AccessTokenBearer, TokenBearer
+from src.auth.revocations import TokenRevocations
+from src.auth.utils import create_access_token
+from src.db.redis import InMemoryRedis
+from src.errors import InvalidToken
+
+from .common import Timer, print_table
+
+REQUESTS = 2000
+ROUND_TRIPS_MS = (0, 0.5)
+
+
+class SlowRedis(InMemoryRedis):
+    def __init__(self, round_trip_ms: float):
+        super().__init__()
+        self.round_trip = round_trip_ms / 1000
+        self.lookups = 0
+
+    async def zscore(self, name, value):
+        self.lookups += 1
+        if self.round_trip:
+            await asyncio.sleep(self.round_trip)
+        return await super().zscore(name, value)
+
+
+async def legacy_call(self, request: Request):
+    creds = await HTTPBearer.__call__(self, request)
+    token = creds.credentials
+    token_content = utils.decode_token(token)
+    # The old TokenBearer.validate_token decoded the token a second time.
+    if utils.decode_token(token) is None:
+        raise InvalidToken()
+    if await revocations.check_token_in_blocklist(token_content["jti"]):
+        raise HTTPException(status_code=403)
+    self.verify_token_data(token_content)
+    return token_content
+
+
+def make_request(token: str) -> Request:
+    headers = [(b"authorization", f"Bearer {token}".encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": headers})
+
+
+async def run(route_bearer, user_bearer, token):
+    for _ in range(REQUESTS):
+        request = make_request(token)
+        await user_bearer(request)
+        await route_bearer(request)
+
+
+async def main():
+    token = create_access_token({"email": "reader@example.com", "user_id": str(uuid.uuid4()), "role": "user"})
+    decodes = 0
+    decode_token = utils.decode_token
+
+    def counting_decode(token):
+        nonlocal decodes
+        decodes += 1
+        return decode_token(token)
+
+    utils.decode_token = dependencies.decode_token = counting_decode
+    current_call = TokenBearer.__call__
+    rows = []
+    for round_trip_ms in ROUND_TRIPS_MS:
+        flows = (
+            ("decode per dependency", legacy_call, False),
+            ("request-scoped context", current_call, False),
+            ("+ local revocations", current_call, True),
+        )
+        for name, call, local in flows:
+            TokenBearer.__call__ = call
+            revocations.token_revocations = TokenRevocations(SlowRedis(round_trip_ms), local=local)
+            if local:
+                # Let the subscription come up and load the revocations before measuring.
+                while not revocations.token_revocations.ready:
+                    await revocations.check_token_in_blocklist("warm-up")
+                    await asyncio.sleep(0)
+                revocations.token_revocations.client.lookups = 0
+            decodes = 0
+            with Timer() as timer:
+                await run(AccessTokenBearer(), AccessTokenBearer(), token)
+            rows.append(
+                (
+                    name,
+                    round_trip_ms,
+                    f"{decodes / REQUESTS:.0f}",
+                    f"{revocations.token_revocations.client.lookups / REQUESTS:.0f}",
+                    f"{timer.elapsed / REQUESTS * 1e6:.0f}",
+                )
+            )
+    TokenBearer.__call__ = current_call
+    utils.decode_token = dependencies.decode_token = decode_token
+
+    print_table(
+        f"{REQUESTS} requests, two AccessTokenBearer dependencies each",
+        ("auth flow", "redis rtt ms", "decodes/request", "blocklist lookups/request", "us/request"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
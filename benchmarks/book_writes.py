@@ -0,0 +1,71 @@
+"""Round trips per request for book updates and deletes.
+
+Compares the previous SELECT-then-write flow with the single
+UPDATE/DELETE ... RETURNING statements used by `BookService`.
+"""
+
+import asyncio
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.books.models import Book
+from src.books.schemas import BookEditRequest
+from src.books.services import BookService
+
+from .common import StatementCounter, Timer, print_table, seed_books, sqlite_engine
+
+BOOKS = 200
+REVIEWS_PER_BOOK = 5
+
+
+async def legacy_update(book_id, book_data: BookEditRequest, session: AsyncSession):
+    book = (await session.exec(select(Book).where(Book.id == book_id))).first()
+    for key, value in book_data.model_dump(exclude_none=True).items():
+        setattr(book, key, value)
+    await session.commit()
+
+
+async def legacy_delete(book_id, session: AsyncSession):
+    book = (await session.exec(select(Book).where(Book.id == book_id))).first()
+    await session.delete(book)
+    await session.commit()
+
+
+async def measure(engine, counter, book_ids, operation):
+    counter.reset()
+    with Timer() as timer:
+        for book_id in book_ids:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                await operation(book_id, session)
+    # +1 per request for the COMMIT, which is not a cursor execution.
+    return counter.count / len(book_ids) + 1, timer.elapsed / len(book_ids) * 1e6
+
+
+async def main():
+    service = BookService()
+    edit = BookEditRequest(title="renamed")
+    rows = []
+    async with sqlite_engine() as engine:
+        counter = StatementCounter(engine)
+        book_ids = await seed_books(engine, BOOKS * 2, REVIEWS_PER_BOOK)
+        legacy_ids, current_ids = book_ids[:BOOKS], book_ids[BOOKS:]
+
+        for name, ids, operation in (
+            ("update (select + setattr)", legacy_ids, lambda i, s: legacy_update(i, edit, s)),
+            ("update (UPDATE RETURNING)", current_ids, lambda i, s: service.update_book(i, edit, s)),
+            ("delete (select + delete)", legacy_ids, legacy_delete),
+            ("delete (DELETE RETURNING)", current_ids, service.delete_book_by_id),
+        ):
+            round_trips, micros = await measure(engine, counter, ids, operation)
+            rows.append((name, f"{round_trips:.1f}", f"{micros:.0f}"))
+
+    print_table(
+        f"{BOOKS} requests each, {REVIEWS_PER_BOOK} reviews per book",
+        ("operation", "round trips/request", "us/request"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
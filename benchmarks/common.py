@@ -0,0 +1,86 @@
+"""Shared helpers for the benchmark scripts.
+
+The benchmarks run against an in-memory SQLite database so they can be run
+anywhere; round-trip counts are the same on Postgres, where each one also
+costs a network hop. Run them from the repository root with the usual
+settings in the environment or in `.env`, e.g.::
+
+    python -m benchmarks.book_writes
+"""
+
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import src  # noqa: F401  registers every model on SQLModel.metadata
+from src.books.cache import book_cache
+from src.books.leaderboards import book_leaderboards
+from src.books.models import Book, Review
+from src.db.redis import InMemoryRedis
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._record)
+
+    def _record(self, *args):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+def use_in_memory_redis():
+    book_cache.client = InMemoryRedis()
+    book_leaderboards.client = InMemoryRedis()
+
+
+@asynccontextmanager
+async def sqlite_engine(url: str = "sqlite+aiosqlite://", **engine_kwargs):
+    use_in_memory_redis()
+    engine_kwargs.setdefault("poolclass", StaticPool)
+    engine = create_async_engine(url, **engine_kwargs)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+
+
+async def seed_books(engine, count: int, reviews_per_book: int = 0) -> list:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        books = [
+            Book(title=f"book {i}", author="author", description="description", created_at=datetime.now())
+            for i in range(count)
+        ]
+        session.add_all(books)
+        for book in books:
+            session.add_all(
+                Review(review_text="review", rating=3, book_id=book.id) for _ in range(reviews_per_book)
+            )
+        await session.commit()
+        return [book.id for book in books]
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+
+def print_table(title: str, header: tuple, rows: list):
+    print(f"\n{title}")
+    widths = [max(len(str(cell)) for cell in column) for column in zip(header, *rows)]
+    for row in (header, *rows):
+        print("  ".join(str(cell).ljust(width) for cell, width in zip(row, widths)))
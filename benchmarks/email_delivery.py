@@ -0,0 +1,117 @@
+"""Email throughput of the Celery email tasks against a local SMTP sink.
+
+Requires ``aiosmtpd`` (``pip install aiosmtpd``), which is not an app
+dependency. The task bodies are called in-process, as a worker would run
+them, for three ways of delivering the same emails:
+
+* per-message: the previous ``send_email``, ``async_to_sync`` around
+  ``FastMail.send_message``, so a new event loop and SMTP session per email;
+* pooled: the current ``send_email``, one task per email on a shared session;
+* batched: ``send_email_batch`` with ``BATCH_SIZE`` emails per task.
+
+The sink can delay its EHLO reply to stand in for the TLS handshake and
+login a real relay costs on every new session.
+"""
+
+import asyncio
+import socket
+
+from aiosmtpd.controller import Controller
+from asgiref.sync import async_to_sync
+from fastapi_mail import ConnectionConfig, FastMail
+
+from src import celery_tasks
+from src.mail import SMTPPool, create_message
+
+from .common import Timer, print_table
+
+EMAILS = 500
+BATCH_SIZE = 50
+HANDSHAKE_MS = (0, 20)
+
+
+class SinkHandler:
+    def __init__(self, handshake_ms: float):
+        self.handshake = handshake_ms / 1000
+        self.sessions = 0
+        self.messages = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        await asyncio.sleep(self.handshake)
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def sink_config(port: int) -> ConnectionConfig:
+    return ConnectionConfig(
+        MAIL_USERNAME="", MAIL_PASSWORD="", MAIL_FROM="bookly@example.com", MAIL_PORT=port,
+        MAIL_SERVER="127.0.0.1", MAIL_STARTTLS=False, MAIL_SSL_TLS=False, USE_CREDENTIALS=False,
+        VALIDATE_CERTS=False,
+    )
+
+
+def emails():
+    return [
+        {"recipients": [f"reader{i}@example.com"], "subject": "Verify your email", "body": f"<p>link {i}</p>"}
+        for i in range(EMAILS)
+    ]
+
+
+def per_message(config):
+    mail = FastMail(config)
+    for email in emails():
+        async_to_sync(mail.send_message)(create_message(**email))
+
+
+def pooled(config):
+    for email in emails():
+        celery_tasks.send_email.run(email["recipients"], email["subject"], email["body"])
+
+
+def batched(config):
+    pending = emails()
+    for start in range(0, len(pending), BATCH_SIZE):
+        celery_tasks.send_email_batch.run(pending[start : start + BATCH_SIZE])
+
+
+def main():
+    rows = []
+    for handshake_ms in HANDSHAKE_MS:
+        for name, deliver in (("per-message", per_message), ("pooled", pooled), ("batched", batched)):
+            handler = SinkHandler(handshake_ms)
+            port = free_port()
+            controller = Controller(handler, hostname="127.0.0.1", port=port)
+            controller.start()
+            config = sink_config(port)
+            celery_tasks.smtp_pool = SMTPPool(config, size=1, max_idle_seconds=60, max_messages=100)
+            try:
+                with Timer() as timer:
+                    deliver(config)
+                celery_tasks.worker_loop.run(celery_tasks.smtp_pool.close())
+            finally:
+                controller.stop()
+            assert handler.messages == EMAILS
+            rows.append(
+                (name, handshake_ms, handler.sessions, f"{timer.elapsed:.2f}", f"{EMAILS / timer.elapsed:.0f}")
+            )
+
+    print_table(
+        f"{EMAILS} emails to a local aiosmtpd sink",
+        ("delivery", "handshake ms", "smtp sessions", "seconds", "emails/s"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Cost of rendering personalized email bodies.
+
+Renders the verification email for ``MESSAGES`` recipients:
+
+* f-string: how the routers built bodies before, for reference;
+* compile per message: ``Environment.from_string`` for every email;
+* get_template per message: a default Jinja environment, which checks the
+  file on disk on every lookup;
+* render_many: `EmailTemplates.render_many`, template looked up once.
+
+Then times how long a fresh worker process takes to compile every template,
+with an empty bytecode cache and with a warm one.
+"""
+
+import tempfile
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from src.mail import BASE_DIR, EmailTemplates
+
+from .common import Timer, print_table
+
+MESSAGES = 5000
+TEMPLATE = "email/verify_email.html"
+FOLDER = Path(BASE_DIR, "templates")
+
+
+def contexts():
+    return [{"first_name": f"reader{i}", "link": f"http://bookly.example/api/v1/auth/verify/{i}"} for i in range(MESSAGES)]
+
+
+def f_string(batch):
+    return [
+        f"""
+    <h1>Welcome to Bookly</h1>
+    <p>Please click this <a href="{context['link']}">Link</a> to verify your email. </p>
+    """
+        for context in batch
+    ]
+
+
+def compile_per_message(batch):
+    env = Environment(loader=FileSystemLoader(FOLDER), autoescape=select_autoescape(["html"]))
+    source = (FOLDER / TEMPLATE).read_text()
+    return [env.from_string(source).render(context) for context in batch]
+
+
+def get_template_per_message(batch):
+    env = Environment(loader=FileSystemLoader(FOLDER), autoescape=select_autoescape(["html"]))
+    return [env.get_template(TEMPLATE).render(context) for context in batch]
+
+
+def main():
+    batch = contexts()
+    rows = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        templates = EmailTemplates(FOLDER, cache_dir)
+        templates.warm()
+        modes = (
+            ("f-string", f_string),
+            ("compile per message", compile_per_message),
+            ("get_template per message", get_template_per_message),
+            ("render_many", lambda batch: templates.render_many(TEMPLATE, batch)),
+        )
+        for name, render in modes:
+            with Timer() as timer:
+                bodies = render(batch)
+            assert len(bodies) == MESSAGES
+            rows.append((name, f"{timer.elapsed * 1000:.0f}", f"{timer.elapsed / MESSAGES * 1e6:.1f}"))
+        print_table(f"Rendering {MESSAGES} verification emails", ("renderer", "total ms", "us/email"), rows)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name in ("empty bytecode cache", "warm bytecode cache"):
+            with Timer() as timer:
+                count = EmailTemplates(FOLDER, cache_dir).warm()
+            rows.append((name, count, f"{timer.elapsed * 1000:.2f}"))
+    print_table("Worker start: compiling every email template", ("cache", "templates", "ms"), rows)
+
+
+if __name__ == "__main__":
+    main()
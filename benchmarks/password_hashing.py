@@ -0,0 +1,125 @@
+"""Read latency while logins hash passwords, with bcrypt inline and on a pool.
+
+A few clients log in over and over while others read a book detail page,
+all through the ASGI app. With bcrypt on the event loop every read waits
+behind whichever hash is running; on the pool reads only wait for the
+database.
+"""
+
+import asyncio
+import statistics
+
+from httpx import ASGITransport, AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src import app
+from src.auth import routers as auth_routers
+from src.auth.hashing import PasswordHasher
+from src.auth.models import User
+from src.auth.utils import generate_password_hash
+from src.books import routes as book_routes
+from src.db.main import get_session
+
+from .common import Timer, print_table, seed_books, sqlite_engine
+
+LOGIN_CLIENTS = 8
+LOGINS_PER_CLIENT = 4
+READ_CLIENTS = 4
+READS_PER_CLIENT = 100
+PASSWORD = "correct horse battery staple"
+
+
+class InlineHasher(PasswordHasher):
+    """The previous behaviour: bcrypt called directly from the handler."""
+
+    async def _run(self, func, *args):
+        self.completed += 1
+        return func(*args)
+
+
+def percentile(samples, fraction):
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * fraction))] * 1000
+
+
+async def traffic(client, book_id):
+    reads, logins, rejected = [], [], 0
+
+    async def login():
+        nonlocal rejected
+        for _ in range(LOGINS_PER_CLIENT):
+            with Timer() as timer:
+                response = await client.post(
+                    "/api/v1/auth/login", json={"email": "reader@example.com", "password": PASSWORD}
+                )
+            if response.status_code == 503:
+                rejected += 1
+            else:
+                logins.append(timer.elapsed)
+
+    async def read():
+        for _ in range(READS_PER_CLIENT):
+            with Timer() as timer:
+                await client.get(f"/api/v1/books/{book_id}")
+            reads.append(timer.elapsed)
+            await asyncio.sleep(0.002)
+
+    await asyncio.gather(*(login() for _ in range(LOGIN_CLIENTS)), *(read() for _ in range(READ_CLIENTS)))
+    return reads, logins, rejected
+
+
+async def main():
+    rows = []
+    async with sqlite_engine() as engine:
+        (book_id,) = await seed_books(engine, 1, reviews_per_book=5)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            session.add(
+                User(
+                    username="reader", first_name="a", last_name="b", email="reader@example.com",
+                    role="user", password=generate_password_hash(PASSWORD), is_verified=True,
+                )
+            )
+            await session.commit()
+
+        async def get_bench_session():
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = get_bench_session
+        app.dependency_overrides[book_routes.access_token_bearer] = lambda: {}
+        app.dependency_overrides[book_routes.role_checker.dependency] = lambda: True
+
+        modes = (
+            ("inline", InlineHasher(workers=1, max_queue=0)),
+            ("4 threads", PasswordHasher(workers=4, max_queue=64)),
+            ("4 threads, queue 2", PasswordHasher(workers=4, max_queue=2)),
+            ("4 processes", PasswordHasher(workers=4, max_queue=64, use_processes=True)),
+        )
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://localhost") as client:
+            for name, hasher in modes:
+                auth_routers.password_hasher = hasher
+                hashed = generate_password_hash(PASSWORD)
+                # Start every worker before measuring.
+                await asyncio.gather(*(hasher.verify(PASSWORD, hashed) for _ in range(hasher.workers)))
+                reads, logins, rejected = await traffic(client, book_id)
+                hasher.shutdown()
+                rows.append(
+                    (
+                        name,
+                        f"{statistics.median(reads) * 1000:.1f}",
+                        f"{percentile(reads, 0.99):.1f}",
+                        f"{max(reads) * 1000:.1f}",
+                        f"{statistics.median(logins) * 1000:.0f}",
+                        rejected,
+                    )
+                )
+
+    print_table(
+        f"{LOGIN_CLIENTS} clients logging in, {READ_CLIENTS} clients reading a book",
+        ("bcrypt", "read p50 ms", "read p99 ms", "read max ms", "login p50 ms", "logins rejected"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+"""Commits and throughput for a burst of concurrent review POSTs.
+
+Each request has its own session, as in the app. The burst is written once
+with one INSERT and COMMIT per review and once through
+`ReviewWriteBatcher`.
+
+SQLite allows one writer at a time, so by default the benchmark uses a
+SQLite file behind a single pooled connection. Set ``BENCHMARK_DB_URL`` to
+an empty Postgres database to measure with real concurrent transactions;
+the tables are created and dropped around the run.
+"""
+
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+
+from contextlib import asynccontextmanager
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.reviews import services as review_services
+from src.reviews.batcher import ReviewWriteBatcher
+from src.reviews.schemas import ReviewCreateRequest
+from src.reviews.services import ReviewService
+
+from .common import Timer, print_table, seed_books, sqlite_engine, use_in_memory_redis
+
+REVIEWS = 2000
+CONCURRENCY = 200
+BOOKS = 50
+WINDOW_MS = 5
+MAX_SIZE = 100
+
+
+@asynccontextmanager
+async def database(directory: str, name: str):
+    url = os.environ.get("BENCHMARK_DB_URL")
+    if url is None:
+        url = f"sqlite+aiosqlite:///{Path(directory) / f'{name}.db'}"
+        async with sqlite_engine(url, poolclass=AsyncAdaptedQueuePool, pool_size=1, max_overflow=0) as engine:
+            yield engine
+        return
+
+    use_in_memory_redis()
+    engine = create_async_engine(url, pool_size=20)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    try:
+        yield engine
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.drop_all)
+        await engine.dispose()
+
+
+class CommitCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "commit", self._record)
+
+    def _record(self, conn):
+        self.count += 1
+
+
+async def burst(engine, book_ids):
+    service = ReviewService()
+    slots = asyncio.Semaphore(CONCURRENCY)
+
+    async def request(i):
+        async with slots, AsyncSession(engine, expire_on_commit=False) as session:
+            review = ReviewCreateRequest(review_text=f"review {i}", rating=i % 5 + 1)
+            return await service.add_review_to_book(None, book_ids[i % len(book_ids)], review, session)
+
+    await asyncio.gather(*(request(i) for i in range(REVIEWS)))
+
+
+async def main():
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name, batched in (("one commit per review", False), ("batched", True)):
+            async with database(directory, f"reviews-{batched}") as engine:
+                book_ids = await seed_books(engine, BOOKS)
+                sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+                batcher = ReviewWriteBatcher(WINDOW_MS, MAX_SIZE, enabled=batched, session_factory=sessions)
+                review_services.review_write_batcher = batcher
+                commits = CommitCounter(engine)
+                with Timer() as timer:
+                    await burst(engine, book_ids)
+                rows.append(
+                    (
+                        name,
+                        commits.count,
+                        f"{REVIEWS / timer.elapsed:.0f}",
+                        f"{commits.count / timer.elapsed:.0f}",
+                        f"{REVIEWS / commits.count:.1f}",
+                    )
+                )
+
+    print_table(
+        f"{REVIEWS} review POSTs, {CONCURRENCY} in flight, window {WINDOW_MS} ms, max batch {MAX_SIZE}",
+        ("mode", "commits", "reviews/s", "commits/s", "reviews/commit"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
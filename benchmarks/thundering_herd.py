@@ -0,0 +1,58 @@
+"""Database queries issued by a burst of concurrent reads of one book.
+
+Every request has its own session and a cold cache, as when a popular book
+has just been updated. The burst is run with `book_reads` coalescing
+switched off and then on.
+"""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.books.cache import book_cache
+from src.books.services import BookService, book_reads
+
+from .common import StatementCounter, Timer, print_table, seed_books, sqlite_engine
+
+CONCURRENCY = (10, 100, 500)
+
+
+async def herd(engine, book_id, size):
+    service = BookService()
+
+    async def request():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            return await service.get_book_detail(book_id, session)
+
+    await book_cache.invalidate(book_id)
+    return await asyncio.gather(*(request() for _ in range(size)))
+
+
+async def main():
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite+aiosqlite:///{Path(directory) / 'herd.db'}"
+        async with sqlite_engine(url) as engine:
+            counter = StatementCounter(engine)
+            (book_id,) = await seed_books(engine, 1, reviews_per_book=20)
+            # Keep every request a cache miss so only coalescing is measured.
+            book_cache.set_detail = lambda *args: asyncio.sleep(0)
+
+            for size in CONCURRENCY:
+                for enabled in (False, True):
+                    book_reads.enabled = enabled
+                    counter.reset()
+                    with Timer() as timer:
+                        await herd(engine, book_id, size)
+                    rows.append(
+                        (size, "on" if enabled else "off", counter.count, f"{timer.elapsed * 1000:.1f}")
+                    )
+
+    print_table("Concurrent detail reads of one book", ("requests", "singleflight", "queries", "ms"), rows)
+    print(f"\nbook_reads: {book_reads.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
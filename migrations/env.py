@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
 from src.auth.models import User
 from src.books.models import Book
+from src.outbox import OutboxEmail
 from sqlmodel import SQLModel
 from src.config import Config
 
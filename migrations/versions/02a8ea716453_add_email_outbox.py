@@ -0,0 +1,48 @@
+"""add email_outbox
+
+Revision ID: 02a8ea716453
+Revises: 35d3272ecc3f
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '02a8ea716453'
+down_revision: Union[str, None] = '35d3272ecc3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'email_outbox',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('recipients', postgresql.JSONB(), nullable=False),
+        sa.Column('subject', sa.String(), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('next_attempt_at', postgresql.TIMESTAMP(), nullable=False),
+        sa.Column('sent_at', postgresql.TIMESTAMP(), nullable=True),
+        sa.Column('failed_at', postgresql.TIMESTAMP(), nullable=True),
+        sa.Column('created_at', postgresql.TIMESTAMP(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_email_outbox_pending',
+        'email_outbox',
+        ['next_attempt_at'],
+        postgresql_where=sa.text('sent_at IS NULL AND failed_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_outbox_pending', table_name='email_outbox')
+    op.drop_table('email_outbox')
@@ -0,0 +1,54 @@
+"""add book_stats review aggregates
+
+Revision ID: 1379a9e1137b
+Revises: 3c0adc3ccdb1
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1379a9e1137b'
+down_revision: Union[str, None] = '3c0adc3ccdb1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = ('review_count', 'rating_sum', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'book_stats',
+        sa.Column('book_id', postgresql.UUID(as_uuid=True), nullable=False),
+        *(sa.Column(name, sa.Integer(), server_default='0', nullable=False) for name in COUNTERS),
+        sa.Column('update_at', postgresql.TIMESTAMP(), nullable=False),
+        sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('book_id'),
+    )
+    op.execute(
+        """
+        INSERT INTO book_stats (book_id, review_count, rating_sum, stars_1, stars_2, stars_3, stars_4, stars_5, update_at)
+        SELECT book_id,
+               count(*),
+               coalesce(sum(rating), 0),
+               count(*) FILTER (WHERE rating = 1),
+               count(*) FILTER (WHERE rating = 2),
+               count(*) FILTER (WHERE rating = 3),
+               count(*) FILTER (WHERE rating = 4),
+               count(*) FILTER (WHERE rating = 5),
+               max(update_at)
+        FROM reviews
+        WHERE book_id IS NOT NULL
+        GROUP BY book_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('book_stats')
@@ -0,0 +1,33 @@
+"""let email_outbox rows carry a template and context instead of a body
+
+Revision ID: 2a148844e799
+Revises: 02a8ea716453
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2a148844e799'
+down_revision: Union[str, None] = '02a8ea716453'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('email_outbox', sa.Column('template', sa.String(), nullable=True))
+    op.add_column('email_outbox', sa.Column('context', postgresql.JSONB(), nullable=True))
+    op.alter_column('email_outbox', 'body', existing_type=sa.Text(), nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM email_outbox WHERE body IS NULL")
+    op.alter_column('email_outbox', 'body', existing_type=sa.Text(), nullable=False)
+    op.drop_column('email_outbox', 'context')
+    op.drop_column('email_outbox', 'template')
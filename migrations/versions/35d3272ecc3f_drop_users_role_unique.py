@@ -0,0 +1,30 @@
+"""drop the unique constraint on users.role
+
+Revision ID: 35d3272ecc3f
+Revises: f92682ff9fcd
+Create Date: 2026-10-18 16:00:00.000000
+
+A unique role meant only one account could ever hold the default "user"
+role, so every signup after the first failed.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '35d3272ecc3f'
+down_revision: Union[str, None] = 'f92682ff9fcd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint('users_role_key', 'users', type_='unique')
+
+
+def downgrade() -> None:
+    op.create_unique_constraint('users_role_key', 'users', ['role'])
@@ -0,0 +1,35 @@
+"""reviews.book_id on delete set null
+
+Revision ID: 3c0adc3ccdb1
+Revises: 381bd0f3ab86
+Create Date: 2026-10-18 11:00:00.000000
+
+Deleting a book used to load its reviews so the ORM could null their
+book_id before the DELETE. The database now does that itself, which lets
+the service delete a book with a single statement.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c0adc3ccdb1'
+down_revision: Union[str, None] = '381bd0f3ab86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint('reviews_book_id_fkey', 'reviews', type_='foreignkey')
+    op.create_foreign_key(
+        'reviews_book_id_fkey', 'reviews', 'books', ['book_id'], ['id'], ondelete='SET NULL'
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('reviews_book_id_fkey', 'reviews', type_='foreignkey')
+    op.create_foreign_key('reviews_book_id_fkey', 'reviews', 'books', ['book_id'], ['id'])
@@ -0,0 +1,75 @@
+"""baseline schema
+
+Revision ID: 81ce5376b4c9
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+Databases that were created by ``init_db`` before migrations existed already
+have these tables; mark them with ``alembic stamp 81ce5376b4c9`` instead of
+running this revision.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '81ce5376b4c9'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', postgresql.UUID(), nullable=False),
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('first_name', sa.String(), nullable=False),
+        sa.Column('last_name', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('role', postgresql.VARCHAR(), server_default='user', nullable=False),
+        sa.Column('password', sa.String(), nullable=False),
+        sa.Column('is_verified', sa.Boolean(), nullable=False),
+        sa.Column('created_at', postgresql.TIMESTAMP(), nullable=False),
+        sa.Column('update_at', postgresql.TIMESTAMP(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('username'),
+        sa.UniqueConstraint('email'),
+        sa.UniqueConstraint('role'),
+    )
+    op.create_table(
+        'books',
+        sa.Column('id', postgresql.UUID(), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('author', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('created_at', postgresql.TIMESTAMP(), nullable=False),
+        sa.Column('update_at', postgresql.TIMESTAMP(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'reviews',
+        sa.Column('id', postgresql.UUID(), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('book_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('review_text', sa.String(), nullable=False),
+        sa.Column('rating', sa.Integer(), nullable=False),
+        sa.Column('created_at', postgresql.TIMESTAMP(), nullable=False),
+        sa.Column('update_at', postgresql.TIMESTAMP(), nullable=False),
+        sa.ForeignKeyConstraint(['book_id'], ['books.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('reviews')
+    op.drop_table('books')
+    op.drop_table('users')
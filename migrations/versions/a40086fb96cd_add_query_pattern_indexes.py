@@ -0,0 +1,54 @@
+"""add indexes for book and review query patterns
+
+Revision ID: a40086fb96cd
+Revises: 1379a9e1137b
+Create Date: 2026-10-18 14:00:00.000000
+
+The indexes are built with CREATE INDEX CONCURRENTLY, so the tables stay
+writable while this runs. That cannot happen inside a transaction, hence the
+autocommit block. A concurrent build that fails leaves an INVALID index
+behind; it is dropped and rebuilt on the next run.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a40086fb96cd'
+down_revision: Union[str, None] = '1379a9e1137b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('ix_books_created_at_id', 'books', ['created_at', 'id']),
+    ('ix_books_user_id_created_at', 'books', ['user_id', 'created_at', 'id']),
+    ('ix_reviews_book_id_created_at', 'reviews', ['book_id', 'created_at', 'id']),
+    ('ix_reviews_user_id', 'reviews', ['user_id']),
+    ('ix_reviews_created_at', 'reviews', ['created_at']),
+)
+
+
+def is_invalid(name: str) -> bool:
+    statement = sa.text(
+        'SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid '
+        'WHERE pg_class.relname = :name AND NOT pg_index.indisvalid'
+    )
+    return op.get_bind().execute(statement, {'name': name}).first() is not None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            if is_invalid(name):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,42 @@
+"""add reviews (book_id, rating) index for rating-sorted review pages
+
+Revision ID: f92682ff9fcd
+Revises: a40086fb96cd
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f92682ff9fcd'
+down_revision: Union[str, None] = 'a40086fb96cd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NAME = 'ix_reviews_book_id_rating'
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        is_invalid = op.get_bind().execute(
+            sa.text(
+                'SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid '
+                'WHERE pg_class.relname = :name AND NOT pg_index.indisvalid'
+            ),
+            {'name': NAME},
+        ).first()
+        if is_invalid:
+            op.drop_index(NAME, table_name='reviews', postgresql_concurrently=True)
+        op.create_index(
+            NAME, 'reviews', ['book_id', 'rating', 'created_at', 'id'], postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(NAME, table_name='reviews', postgresql_concurrently=True, if_exists=True)
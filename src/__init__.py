@@ -2,7 +2,7 @@ from fastapi import FastAPI, status
 from contextlib import asynccontextmanager
 
 from fastapi.responses import JSONResponse
-from src.db.main import init_db
+from src.db.main import db_pool, init_db
 from src.books.routes import book_routes
 from src.auth.routers import auth_router
 from .middleware import register_middleware
@@ -15,6 +15,13 @@ from .errors import (
     register_all_errors,
 )
 from src.reviews.routes import reviews_router
+from src.auth.hashing import password_hasher
+from src.auth.principals import user_principals
+from src.auth.revocations import token_revocations
+from src.books.bloom import book_id_filter
+from src.books.cache import book_cache
+from src.books.services import book_reads
+from src.reviews.batcher import review_write_batcher
 
 
 @asynccontextmanager
@@ -22,6 +29,7 @@ async def lifespan(app: FastAPI):
     print("server is starting..")
     await init_db()
     yield
+    await token_revocations.close()
     print("server has been stopped")
 
 
@@ -45,6 +53,20 @@ async def get_app_status():
     return {"message": "Application is up"}
 
 
+@app.get("/stats")
+async def get_app_stats():
+    return {
+        "book_cache": book_cache.stats(),
+        "book_reads": book_reads.stats(),
+        "book_ids": book_id_filter.stats(),
+        "review_writes": review_write_batcher.stats(),
+        "principals": user_principals.stats(),
+        "password_hashing": password_hasher.stats(),
+        "token_revocations": token_revocations.stats(),
+        "db_pool": db_pool.stats(),
+    }
+
+
 app.include_router(book_routes, prefix=f"/api/{version}/books", tags=["books"])
 app.include_router(auth_router, prefix=f"/api/{version}/auth", tags=["auth"])
 app.include_router(reviews_router, prefix=f"/api/{version}/reviews", tags=["reviews"])
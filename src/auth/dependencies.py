@@ -10,43 +10,58 @@ from src.errors import (
     RefreshTokenRequired,
 )
 from .models import User
+from .principals import Principal, user_principals
+from .revocations import check_token_in_blocklist
 from src.db.main import get_session
-from src.db.redis import check_token_in_blocklist
 from .utils import decode_token
 from sqlmodel.ext.asyncio.session import AsyncSession
 from .services import UserService
-from typing import List
+from typing import List, NamedTuple
 
 user_service = UserService()
 
 
+class AuthContext(NamedTuple):
+    token: str
+    claims: dict
+
+
+async def authenticate(request: Request, token: str) -> dict:
+    """Decode, verify and blocklist-check ``token`` once per request.
+
+    Every bearer dependency of the request shares the result through
+    ``request.state``, whichever `TokenBearer` instance runs first.
+    """
+    context: AuthContext | None = getattr(request.state, "auth", None)
+    if context is not None and context.token == token:
+        return context.claims
+
+    token_content = decode_token(token)
+    if token_content is None:
+        raise InvalidToken()
+    if await check_token_in_blocklist(token_content["jti"]):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={
+                "error": "This token is invalid or revoked.",
+                "resolution": "Please get a new token",
+            },
+        )
+
+    request.state.auth = AuthContext(token, token_content)
+    return token_content
+
+
 class TokenBearer(HTTPBearer):
     def __init__(self, auto_error=True):
         super().__init__(auto_error=auto_error)
 
     async def __call__(self, request: Request) -> dict | None:
         creds = await super().__call__(request)
-        token = creds.credentials
-        token_content = decode_token(token)
-
-        if not self.validate_token(token):
-            raise InvalidToken()
-        if await check_token_in_blocklist(token_content["jti"]):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail={
-                    "error": "This token is invalid or revoked.",
-                    "resolution": "Please get a new token",
-                },
-            )
-
+        token_content = await authenticate(request, creds.credentials)
         self.verify_token_data(token_content)
         return token_content
 
-    def validate_token(self, token) -> bool:
-        token_data = decode_token(token)
-        return True if token_data is not None else False
-
     def verify_token_data(self, token_content: dict):
         raise NotImplementedError("Please provide an implementation in child classes")
 
@@ -72,13 +87,23 @@ async def get_current_user(
     return user
 
 
+async def get_current_principal(
+    user_info: dict = Depends(AccessTokenBearer()),
+    session: AsyncSession = Depends(get_session),
+) -> Principal:
+    principal = await user_principals.get(user_info["user"]["email"], session)
+    if principal is None:
+        raise InvalidToken()
+    return principal
+
+
 class RoleChecker:
     def __init__(self, allowed_roles: List[str]):
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_user)):
-        if not current_user.is_verified:
+    def __call__(self, principal: Principal = Depends(get_current_principal)):
+        if not principal.is_verified:
             raise AccountNotVerified()
-        if current_user.role not in self.allowed_roles:
+        if principal.role not in self.allowed_roles:
             raise InsufficientPermission()
         return True
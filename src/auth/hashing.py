@@ -0,0 +1,106 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
+
+from src.config import Config
+from src.errors import PasswordHashingBusy
+
+from .utils import generate_password_hash, verify_password
+
+
+class PasswordHasher:
+    """Run bcrypt off the event loop on at most ``workers`` threads or processes.
+
+    Up to ``max_queue`` calls may wait for a free worker; past that the call
+    fails fast with `PasswordHashingBusy` instead of piling up, so a burst of
+    logins costs those logins a 503 rather than stalling every request on the
+    worker. bcrypt releases the GIL, so threads are usually enough.
+    """
+
+    def __init__(self, workers: int, max_queue: int, use_processes: bool = False):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.use_processes = use_processes
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            pool = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            self._executor = pool(max_workers=self.workers)
+        return self._executor
+
+    async def hash(self, password: str) -> str:
+        return await self._run(generate_password_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        """Hash ``passwords`` with at most one call in flight per worker.
+
+        A bulk job therefore never takes queue slots, which stay free for
+        interactive logins.
+        """
+        slots = asyncio.Semaphore(self.workers)
+
+        async def hash_one(password: str) -> str:
+            async with slots:
+                return await self.hash(password)
+
+        return list(await asyncio.gather(*(hash_one(password) for password in passwords)))
+
+    async def _run(self, func, *args):
+        if self.pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordHashingBusy()
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        submitted = time.perf_counter()
+        try:
+            future = self.executor.submit(_timed, func, *args)
+            result, started, finished = await asyncio.wrap_future(future)
+        finally:
+            self.pending -= 1
+        # perf_counter is system-wide, so the worker's timestamps are comparable across processes too.
+        self.wait_seconds += max(0.0, started - submitted)
+        self.run_seconds += finished - started
+        self.completed += 1
+        return result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "queued": max(0, self.pending - self.workers),
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "average_wait_ms": self.wait_seconds / self.completed * 1000 if self.completed else 0.0,
+            "average_run_ms": self.run_seconds / self.completed * 1000 if self.completed else 0.0,
+        }
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, started, time.perf_counter()
+
+
+password_hasher = PasswordHasher(
+    workers=Config.PASSWORD_HASH_WORKERS,
+    max_queue=Config.PASSWORD_HASH_MAX_QUEUE,
+    use_processes=Config.PASSWORD_HASH_USE_PROCESSES,
+)
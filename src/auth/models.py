@@ -29,7 +29,7 @@ class User(SQLModel, table=True):
     )
     email: str = Field(sa_column=Column(String, nullable=False, unique=True))
     role: str = Field(
-        sa_column=Column(pg.VARCHAR, nullable=False, unique=True, server_default="user")
+        sa_column=Column(pg.VARCHAR, nullable=False, server_default="user")
     )
     password: str = Field(
         exclude=True,
@@ -0,0 +1,134 @@
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from redis.exceptions import RedisError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.redis import redis_client
+
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+
+class Principal(NamedTuple):
+    id: uuid.UUID
+    email: str
+    role: str
+    is_verified: bool
+
+
+class PrincipalCache:
+    """What authorization needs to know about a user, keyed by email.
+
+    Lookups go to an in-process LRU of at most ``max_size`` entries, each kept
+    for ``local_ttl`` seconds, then to Redis (``ttl`` seconds), then to a
+    column-only query on ``users`` that never touches the user's books or
+    reviews. `UserService.update_user` invalidates both tiers; other
+    processes may serve their local copy for up to ``local_ttl`` seconds.
+    """
+
+    def __init__(self, client, ttl: int, local_ttl: int, max_size: int):
+        self.client = client
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.max_size = max_size
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.loads = 0
+        self._local: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+
+    def key(self, email: str) -> str:
+        return f"bookly:principal:{email}"
+
+    async def get(self, email: str, session: AsyncSession) -> Optional[Principal]:
+        principal = self._get_local(email)
+        if principal is not None:
+            self.local_hits += 1
+            return principal
+
+        principal = await self._get_redis(email)
+        if principal is not None:
+            self.redis_hits += 1
+        else:
+            principal = await self.load(email, session)
+            if principal is None:
+                return None
+            await self._set_redis(principal)
+        self._set_local(principal)
+        return principal
+
+    async def load(self, email: str, session: AsyncSession) -> Optional[Principal]:
+        self.loads += 1
+        statement = select(User.id, User.email, User.role, User.is_verified).where(User.email == email)
+        row = (await session.exec(statement)).first()
+        return Principal(*row) if row is not None else None
+
+    async def invalidate(self, email: str) -> None:
+        self._local.pop(email, None)
+        try:
+            await self.client.delete(self.key(email))
+        except RedisError:
+            logger.warning("Principal cache invalidation failed for %s", email, exc_info=True)
+
+    def clear(self):
+        self._local.clear()
+
+    def _get_local(self, email: str) -> Optional[Principal]:
+        entry = self._local.get(email)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at < time.monotonic():
+            del self._local[email]
+            return None
+        self._local.move_to_end(email)
+        return principal
+
+    def _set_local(self, principal: Principal):
+        self._local[principal.email] = (time.monotonic() + self.local_ttl, principal)
+        self._local.move_to_end(principal.email)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    async def _get_redis(self, email: str) -> Optional[Principal]:
+        try:
+            payload = await self.client.get(self.key(email))
+        except RedisError:
+            logger.warning("Principal cache read failed for %s", email, exc_info=True)
+            return None
+        if payload is None:
+            return None
+        data = json.loads(payload)
+        return Principal(uuid.UUID(data["id"]), data["email"], data["role"], data["is_verified"])
+
+    async def _set_redis(self, principal: Principal):
+        payload = json.dumps({**principal._asdict(), "id": str(principal.id)})
+        try:
+            await self.client.set(self.key(principal.email), payload, ex=self.ttl)
+        except RedisError:
+            logger.warning("Principal cache write failed for %s", principal.email, exc_info=True)
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.redis_hits + self.loads
+        return {
+            "size": len(self._local),
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "loads": self.loads,
+            "hit_ratio": (self.local_hits + self.redis_hits) / lookups if lookups else 0.0,
+        }
+
+
+user_principals = PrincipalCache(
+    redis_client,
+    ttl=Config.USER_PRINCIPAL_TTL,
+    local_ttl=Config.USER_PRINCIPAL_LOCAL_TTL,
+    max_size=Config.USER_PRINCIPAL_CACHE_SIZE,
+)
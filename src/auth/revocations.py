@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from redis.exceptions import ConnectionError, RedisError
+
+from src.config import Config
+from src.db.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+REVOKED_KEY = "bookly:tokens:revoked"
+REVOKED_CHANNEL = "bookly:tokens:revoked"
+RECONNECT_SECONDS = 1
+# A subscription that stays silent this long is pinged, and dropped if the ping goes unanswered as long again.
+HEALTH_CHECK_SECONDS = 15
+
+
+class TokenRevocations:
+    """Revoked token ids, checked against an in-process copy instead of Redis.
+
+    Revocations live in one Redis sorted set scored by each token's ``exp``,
+    so an entry lasts exactly as long as the token it revokes would have,
+    and are announced on a pub/sub channel. Every process keeps a local copy
+    fed by that channel and reloaded from the sorted set each time the
+    subscription is (re)established. Until the first load completes, while
+    the subscription is down or unresponsive, or when ``local`` is off, each
+    check is a Redis round trip as before.
+    """
+
+    def __init__(self, client, local: bool = True):
+        self.client = client
+        self.local = local
+        self.ready = False
+        self.local_checks = 0
+        self.redis_checks = 0
+        self.resyncs = 0
+        self._revoked: Dict[str, float] = {}
+        self._purge_at = 1024
+        self._listener: Optional[asyncio.Task] = None
+
+    async def revoke(self, jti: str, expires_at: float):
+        await self.client.zadd(REVOKED_KEY, {jti: expires_at})
+        await self.client.zremrangebyscore(REVOKED_KEY, "-inf", time.time())
+        await self.client.publish(REVOKED_CHANNEL, f"{jti} {expires_at}")
+        self._add(jti, expires_at)
+
+    async def is_revoked(self, jti: str) -> bool:
+        if not self.local:
+            return await self._is_revoked_in_redis(jti)
+        self._ensure_listener()
+        if not self.ready:
+            return await self._is_revoked_in_redis(jti)
+        self.local_checks += 1
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    async def _is_revoked_in_redis(self, jti: str) -> bool:
+        self.redis_checks += 1
+        expires_at = await self.client.zscore(REVOKED_KEY, jti)
+        return expires_at is not None and expires_at > time.time()
+
+    async def resync(self):
+        members = await self.client.zrangebyscore(REVOKED_KEY, time.time(), "+inf", withscores=True)
+        self._revoked = {_decode(jti): expires_at for jti, expires_at in members}
+        self._purge_at = max(1024, 2 * len(self._revoked))
+        self.resyncs += 1
+
+    def _add(self, jti: str, expires_at: float):
+        self._revoked[jti] = expires_at
+        if len(self._revoked) >= self._purge_at:
+            now = time.time()
+            self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+            self._purge_at = max(1024, 2 * len(self._revoked))
+
+    def _ensure_listener(self):
+        loop = asyncio.get_running_loop()
+        if self._listener is None or self._listener.done() or self._listener.get_loop() is not loop:
+            self.ready = False
+            self._listener = loop.create_task(self.listen())
+
+    async def listen(self):
+        while True:
+            try:
+                async with self.client.pubsub() as pubsub:
+                    await pubsub.subscribe(REVOKED_CHANNEL)
+                    await self._consume(pubsub)
+            except RedisError:
+                logger.warning("Token revocation subscription lost, checking Redis until it is back", exc_info=True)
+            self.ready = False
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+    async def _consume(self, pubsub):
+        awaiting_pong = False
+        while True:
+            message = await pubsub.get_message(timeout=HEALTH_CHECK_SECONDS)
+            if message is None:
+                # A half-open connection never errors, it just goes quiet; make it answer.
+                if awaiting_pong:
+                    raise ConnectionError("Token revocation subscription stopped responding")
+                await pubsub.ping()
+                awaiting_pong = True
+                continue
+            awaiting_pong = False
+            # redis re-subscribes after a reconnect and confirms it again; anything
+            # published while the connection was down is picked up by the resync.
+            if message["type"] == "subscribe":
+                await self.resync()
+                self.ready = True
+            elif message["type"] == "message":
+                jti, expires_at = _decode(message["data"]).split()
+                self._add(jti, float(expires_at))
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        self.ready = False
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "revoked": len(self._revoked),
+            "local_checks": self.local_checks,
+            "redis_checks": self.redis_checks,
+            "resyncs": self.resyncs,
+        }
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+token_revocations = TokenRevocations(redis_client, local=Config.TOKEN_REVOCATION_LOCAL_CACHE)
+
+
+async def add_jti_to_blocklist(jti: str, expires_at: float) -> None:
+    await token_revocations.revoke(jti, expires_at)
+
+
+async def check_token_in_blocklist(jti: str) -> bool:
+    return await token_revocations.is_revoked(jti)
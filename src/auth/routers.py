@@ -1,33 +1,36 @@
+import logging
+
 from fastapi import APIRouter, Depends, BackgroundTasks, status
+from fastapi.concurrency import run_in_threadpool
 from datetime import timedelta
 from fastapi.responses import JSONResponse
 
-from src import mail
-from src.celery_tasks import send_email
+from src.celery_tasks import dispatch_email_outbox
 from src.config import Config
-from src.errors import InvalidToken, UserAlreadyExists, UserNotFound
-from src.mail import create_message
+from src.errors import InvalidToken, UserNotFound
+from src.outbox import email_outbox
 from .schemas import (
     EmailModel,
     PasswordResetConfirmationSchema,
     PasswordResetRequestSchema,
     User,
+    UserBulkProvisionRequest,
+    UserBulkProvisionResponse,
     UserLoginRequest,
     UserLoginResponse,
     UserSignupRequest,
     UserSignupResponse,
 )
 from src.db.main import get_session
-from src.db.redis import add_jti_to_blocklist
 from sqlmodel.ext.asyncio.session import AsyncSession
 from .services import UserService
 from .utils import (
     create_access_token,
     decode_url_safe_token,
-    generate_password_hash,
     generate_url_safe_token,
-    verify_password,
 )
+from .hashing import password_hasher
+from .revocations import add_jti_to_blocklist
 from .dependencies import (
     RefreshTokenBearer,
     AccessTokenBearer,
@@ -39,7 +42,18 @@ from datetime import datetime
 auth_router = APIRouter()
 user_service = UserService()
 role_checker = RoleChecker(["admin", "user"])
+admin_role_checker = Depends(RoleChecker(["admin"]))
 REFRESH_TOKEN_EXPIRY = 2
+logger = logging.getLogger(__name__)
+
+
+async def kick_email_dispatch():
+    """Ask a worker to drain the outbox now; best effort, the beat schedule drains it regardless."""
+    try:
+        # Publishing is blocking broker I/O; without retries an outage fails fast instead of holding a thread.
+        await run_in_threadpool(dispatch_email_outbox.apply_async, retry=False)
+    except Exception:
+        logger.warning("Could not queue an outbox dispatch, leaving it to the beat schedule", exc_info=True)
 
 
 @auth_router.post("/password-reset-request/{token}")
@@ -58,10 +72,11 @@ async def confirm_password_reset(
     user = await user_service.get_user_by_email(user_email, session)
     if user is None:
         raise UserNotFound()
-    await user_service.update_user(user, {"password": generate_password_hash(passwords_data.new_password)}, session)
-    html = "<h1>Your password has been reset successfully</h1>"
-    message = create_message(recipients=[user_email], subject="Password reset successful", body=html)
-    await mail.send_message(message)
+    email_outbox.enqueue(
+        session, [user_email], "Password reset successful", template="email/password_reset_done.html"
+    )
+    await user_service.update_user(user, {"password": await password_hasher.hash(passwords_data.new_password)}, session)
+    await kick_email_dispatch()
     return JSONResponse(
         content={"message": "Password reset successful"},
         status_code=status.HTTP_200_OK,
@@ -77,12 +92,11 @@ async def request_password_reset(email_data: PasswordResetRequestSchema, session
 
     token = generate_url_safe_token({"email": email})
     link = f"http://{Config.DOMAIN}/api/v1/auth/password-reset-request/{token}"
-    html = f"""
-    <h1>Bookly: Password Reset</h1>
-    <p>Please click this <a href="{link}">Link</a> to reset your password. </p>
-    """
-    message = create_message(recipients=[email], subject="Reset your password", body=html)
-    await mail.send_message(message)
+    email_outbox.enqueue(
+        session, [email], "Reset your password", template="email/password_reset.html", context={"link": link}
+    )
+    await session.commit()
+    await kick_email_dispatch()
 
     return JSONResponse(
         content={
@@ -113,10 +127,15 @@ async def verify_user_account(token: str, session: AsyncSession = Depends(get_se
     user = await user_service.get_user_by_email(user_email, session)
     if user is None:
         raise UserNotFound()
+    email_outbox.enqueue(
+        session,
+        [user_email],
+        "Bookly Account Activated",
+        template="email/account_activated.html",
+        context={"first_name": user.first_name},
+    )
     await user_service.update_user(user, {"is_verified": True}, session)
-    html = "<h1>Bookly Account Activated</h1>"
-
-    send_email.delay([user_email], "Bookly Account Activated", html)
+    await kick_email_dispatch()
     return JSONResponse(
         content={"message": "Account verified successfuly"},
         status_code=status.HTTP_200_OK,
@@ -130,19 +149,18 @@ async def signup(
     session: AsyncSession = Depends(get_session),
 ):
     email = user_data.email
-    user_exists = await user_service.user_exists(email, session)
-    if user_exists:
-        raise UserAlreadyExists()
-
-    new_user = await user_service.create_user(user_data, session)
     token = generate_url_safe_token({"email": email})
     link = f"http://{Config.DOMAIN}/api/v1/auth/verify/{token}"
-    html = f"""
-    <h1>Welcome to Bookly</h1>
-    <p>Please click this <a href="{link}">Link</a> to verify your email. </p>
-    """
-    subject = "Verify your email"
-    send_email.delay([email], subject, html)
+    # Committed by create_user along with the account, or rolled back if the account exists.
+    email_outbox.enqueue(
+        session,
+        [email],
+        "Verify your email",
+        template="email/verify_email.html",
+        context={"link": link, "first_name": user_data.first_name},
+    )
+    new_user = await user_service.create_user(user_data, session)
+    await kick_email_dispatch()
     return JSONResponse(
         content={
             "message": "Account created. Check your email to verify account",
@@ -153,6 +171,24 @@ async def signup(
     )
 
 
+@auth_router.post(
+    "/users/bulk",
+    response_model=UserBulkProvisionResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[admin_role_checker],
+)
+async def provision_users(request: UserBulkProvisionRequest, session: AsyncSession = Depends(get_session)):
+    created = await user_service.create_users(request.users, session, is_verified=request.is_verified)
+    created_emails = {user.email for user in created}
+    skipped = []
+    for user in request.users:
+        if user.email in created_emails:
+            created_emails.remove(user.email)
+        else:
+            skipped.append(user.email)
+    return UserBulkProvisionResponse(created=len(created), skipped=skipped)
+
+
 @auth_router.post("/login", response_model=UserLoginResponse, status_code=status.HTTP_201_CREATED)
 async def login(login_data: UserLoginRequest, session: AsyncSession = Depends(get_session)):
     email = login_data.email
@@ -160,7 +196,7 @@ async def login(login_data: UserLoginRequest, session: AsyncSession = Depends(ge
     if user is None:
         raise UserNotFound()
 
-    if not verify_password(login_data.password, user.password):
+    if not await password_hasher.verify(login_data.password, user.password):
         raise UserNotFound()
 
     access_token = create_access_token(
@@ -227,6 +263,5 @@ async def get_current_user(user=Depends(get_current_user), _: bool = Depends(rol
 async def revoke_token(
     token_info: dict = Depends(AccessTokenBearer()),
 ):
-    jti = token_info["jti"]
-    await add_jti_to_blocklist(jti)
+    await add_jti_to_blocklist(token_info["jti"], token_info["exp"])
     return JSONResponse(content={"message": "Logout successful"}, status_code=status.HTTP_200_OK)
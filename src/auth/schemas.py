@@ -32,6 +32,19 @@ class UserSignupResponse(BaseModel):
     user: dict
 
 
+MAX_BULK_USERS = 1000
+
+
+class UserBulkProvisionRequest(BaseModel):
+    users: List[UserSignupRequest] = Field(min_length=1, max_length=MAX_BULK_USERS)
+    is_verified: bool = False
+
+
+class UserBulkProvisionResponse(BaseModel):
+    created: int
+    skipped: List[str]
+
+
 class User(BaseModel):
     first_name: str
     last_name: str
@@ -1,8 +1,30 @@
+import uuid
+from datetime import datetime
+from typing import List
+
 from sqlmodel import select
 from src.auth.models import User
 from src.auth.schemas import UserSignupRequest
 from sqlmodel.ext.asyncio.session import AsyncSession
-from .utils import generate_password_hash, verify_password
+from src.books.stats import upsert_for
+from src.errors import UserAlreadyExists
+from .hashing import password_hasher
+from .principals import user_principals
+
+BULK_INSERT_BATCH_SIZE = 500
+
+
+def new_user_row(data: UserSignupRequest, hashed_password: str, is_verified: bool = False) -> dict:
+    now = datetime.now()
+    return {
+        **data.model_dump(),
+        "id": uuid.uuid4(),
+        "password": hashed_password,
+        "role": "user",
+        "is_verified": is_verified,
+        "created_at": now,
+        "update_at": now,
+    }
 
 
 class UserService:
@@ -21,22 +43,44 @@ class UserService:
         return True
 
     async def create_user(self, data: UserSignupRequest, session: AsyncSession):
-        user_exists = await self.user_exists(data.email, session)
-        if user_exists:
-            return
+        """Insert the user in one statement; an email or username already taken raises `UserAlreadyExists`."""
+        row = new_user_row(data, await password_hasher.hash(data.password))
+        insert = upsert_for(session)
+        result = await session.exec(insert(User).values(row).on_conflict_do_nothing().returning(User.id))
+        if result.first() is None:
+            await session.rollback()
+            raise UserAlreadyExists()
+        await session.commit()
+        return User(**row)
 
-        user_data_dict = data.model_dump()
+    async def create_users(
+        self, users: List[UserSignupRequest], session: AsyncSession, is_verified: bool = False
+    ) -> List[User]:
+        """Insert ``users`` in batches, skipping any whose email or username is taken.
 
-        new_user = User(**user_data_dict)
-        new_user.password = generate_password_hash(new_user.password)
-        new_user.role = "user"
-        session.add(new_user)
-        await session.commit()
-        return new_user
+        Each batch of `BULK_INSERT_BATCH_SIZE` is one INSERT and one COMMIT.
+        Returns the users that were created.
+        """
+        hashed_passwords = await password_hasher.hash_many([user.password for user in users])
+        rows = [
+            new_user_row(user, hashed_password, is_verified)
+            for user, hashed_password in zip(users, hashed_passwords)
+        ]
+        insert = upsert_for(session)
+        created = []
+        for start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+            batch = rows[start : start + BULK_INSERT_BATCH_SIZE]
+            result = await session.exec(insert(User).values(batch).on_conflict_do_nothing().returning(User.id))
+            inserted = {user_id for (user_id,) in result.all()}
+            await session.commit()
+            created += [User(**row) for row in batch if row["id"] in inserted]
+        return created
 
     async def update_user(self, user: User, user_data: dict, session: AsyncSession):
+        email = user.email
         for key, value in user_data.items():
             setattr(user, key, value)
 
         await session.commit()
+        await user_principals.invalidate(email)
         return user
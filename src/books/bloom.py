@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.main import async_session_factory
+
+from .models import Book
+
+logger = logging.getLogger(__name__)
+
+MIN_CAPACITY = 10_000
+REBUILD_RETRY_SECONDS = 30
+
+
+class BloomFilter:
+    """Fixed-size set of UUIDs with no false negatives.
+
+    ``capacity`` and ``error_rate`` size the bit array; past ``capacity``
+    members the false positive rate climbs above ``error_rate``.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: UUID):
+        digest = hashlib.blake2b(value.bytes, digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, value: UUID):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: UUID) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class BookIdFilter:
+    """In-process Bloom filter of every book id, for existence checks that skip the database.
+
+    A miss means the book does not exist unless it was created by another
+    process since the last build; with ``confirm_misses`` those are checked
+    with a primary-key lookup and learned. Deleted books stay in the filter
+    until the next rebuild, every ``rebuild_seconds``, so a hit is only a
+    "maybe" and the foreign key on ``reviews.book_id`` stays the final guard.
+
+    Rebuilds run in a background task with their own session and swap the
+    new filter in when done; checks keep using the current filter meanwhile.
+    Only before the first build completes is every check a primary-key lookup.
+    """
+
+    def __init__(self, error_rate: float, rebuild_seconds: int, confirm_misses: bool = True):
+        self.error_rate = error_rate
+        self.rebuild_seconds = rebuild_seconds
+        self.confirm_misses = confirm_misses
+        self.checks = 0
+        self.rejections = 0
+        self.confirmations = 0
+        self._filter: Optional[BloomFilter] = None
+        self._built_at = 0.0
+        self._retry_at = 0.0
+        self._rebuild: Optional[asyncio.Task] = None
+        self._added_during_build: Optional[List[UUID]] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._filter is not None
+
+    @property
+    def stale(self) -> bool:
+        return (
+            self._filter is None
+            or time.monotonic() - self._built_at > self.rebuild_seconds
+            or self._filter.count > self._filter.capacity
+        )
+
+    def clear(self):
+        self._filter = None
+
+    def add(self, book_id: UUID):
+        if self._added_during_build is not None:
+            self._added_during_build.append(book_id)
+        if self._filter is not None:
+            self._filter.add(book_id)
+
+    async def build(self, session: AsyncSession):
+        self._added_during_build = []
+        try:
+            count = (await session.exec(select(func.count()).select_from(Book))).one()
+            bloom = BloomFilter(max(MIN_CAPACITY, count * 2), self.error_rate)
+            result = await session.stream(select(Book.id).execution_options(yield_per=10_000))
+            async for (book_id,) in result:
+                bloom.add(book_id)
+            # Books created while the ids were streaming may have been missed by the snapshot.
+            for book_id in self._added_during_build:
+                bloom.add(book_id)
+        finally:
+            self._added_during_build = None
+        self._filter = bloom
+        self._built_at = time.monotonic()
+
+    @property
+    def rebuilding(self) -> bool:
+        return self._rebuild is not None and not self._rebuild.done()
+
+    def _ensure_rebuild(self, bind):
+        loop = asyncio.get_running_loop()
+        if self._rebuild is not None and not self._rebuild.done() and self._rebuild.get_loop() is loop:
+            return
+        if time.monotonic() < self._retry_at:
+            return
+        self._rebuild = loop.create_task(self._rebuild_in_background(bind))
+
+    async def _rebuild_in_background(self, bind):
+        try:
+            async with async_session_factory(bind=bind) as session:
+                await self.build(session)
+        except Exception:
+            self._retry_at = time.monotonic() + REBUILD_RETRY_SECONDS
+            logger.exception("Book id filter rebuild failed, keeping the previous filter")
+
+    async def might_exist(self, book_id: UUID, session: AsyncSession) -> bool:
+        if self.stale:
+            self._ensure_rebuild(session.bind)
+
+        self.checks += 1
+        bloom = self._filter
+        if bloom is not None and book_id in bloom:
+            return True
+        if bloom is None or self.confirm_misses:
+            result = await session.exec(select(Book.id).where(Book.id == book_id))
+            if result.first() is not None:
+                if bloom is not None:
+                    self.confirmations += 1
+                    self.add(book_id)
+                return True
+        self.rejections += 1
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "rebuilding": self.rebuilding,
+            "members": self._filter.count if self._filter else 0,
+            "checks": self.checks,
+            "rejections": self.rejections,
+            "confirmations": self.confirmations,
+        }
+
+
+book_id_filter = BookIdFilter(
+    error_rate=Config.BOOK_FILTER_ERROR_RATE,
+    rebuild_seconds=Config.BOOK_FILTER_REBUILD_SECONDS,
+    confirm_misses=Config.BOOK_FILTER_CONFIRM_MISSES,
+)
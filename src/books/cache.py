@@ -0,0 +1,74 @@
+import logging
+from typing import List
+from uuid import UUID
+
+from redis.exceptions import RedisError
+
+from src.config import Config
+from src.db.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cached payload format changes so old entries are never read.
+BOOK_CACHE_VERSION = 3
+INVALIDATE_BATCH_SIZE = 500
+
+
+class BookCache:
+    """Read-through cache of serialized `BookDetailResponse` payloads.
+
+    Each entry is the response ETag, a newline, then the JSON body.
+    """
+
+    def __init__(self, client, ttl: int, version: int = BOOK_CACHE_VERSION):
+        self.client = client
+        self.ttl = ttl
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, book_id: UUID) -> str:
+        return f"bookly:book:v{self.version}:{book_id}"
+
+    async def get_detail(self, book_id: UUID) -> bytes | None:
+        try:
+            payload = await self.client.get(self.key(book_id))
+        except RedisError:
+            logger.warning("Book cache read failed for %s", book_id, exc_info=True)
+            payload = None
+        if payload is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return payload
+
+    async def set_detail(self, book_id: UUID, payload: bytes) -> None:
+        try:
+            await self.client.set(self.key(book_id), payload, ex=self.ttl)
+        except RedisError:
+            logger.warning("Book cache write failed for %s", book_id, exc_info=True)
+
+    async def invalidate(self, book_id: UUID) -> None:
+        try:
+            await self.client.delete(self.key(book_id))
+        except RedisError:
+            logger.warning("Book cache invalidation failed for %s", book_id, exc_info=True)
+
+    async def invalidate_many(self, book_ids: List[UUID]) -> None:
+        keys = [self.key(book_id) for book_id in book_ids]
+        try:
+            for start in range(0, len(keys), INVALIDATE_BATCH_SIZE):
+                await self.client.delete(*keys[start : start + INVALIDATE_BATCH_SIZE])
+        except RedisError:
+            logger.warning("Book cache invalidation failed for %d books", len(keys), exc_info=True)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+book_cache = BookCache(redis_client, ttl=Config.BOOK_CACHE_TTL)
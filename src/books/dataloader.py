@@ -0,0 +1,87 @@
+import asyncio
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from fastapi import Depends
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.main import get_session
+
+from .loaders import BOOK_LIST_LOADER
+
+current_book_loader: ContextVar[Optional["BookLoader"]] = ContextVar("current_book_loader", default=None)
+
+
+class BookLoader:
+    """Request-scoped batcher for book lookups by id.
+
+    Every `load` issued during the same event-loop tick is resolved by one
+    ``get_books_by_ids`` query per loader strategy, and results are memoized
+    for the rest of the request.
+    """
+
+    def __init__(self, session: AsyncSession, book_service=None):
+        if book_service is None:
+            from .services import BookService
+
+            book_service = BookService()
+        self.session = session
+        self.book_service = book_service
+        self.batches = 0
+        self._cache: Dict[tuple, asyncio.Future] = {}
+        self._queue: Dict[int, Dict[UUID, asyncio.Future]] = {}
+        self._loaders: Dict[int, tuple] = {}
+        self._dispatch_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def load(self, book_id: UUID, loader=BOOK_LIST_LOADER) -> asyncio.Future:
+        key = (id(loader), book_id)
+        future = self._cache.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._cache[key] = future
+            self._queue.setdefault(id(loader), {})[book_id] = future
+            self._loaders[id(loader)] = loader
+            if self._dispatch_task is None:
+                # Let every caller in the current tick enqueue before querying.
+                self._dispatch_task = asyncio.ensure_future(self._dispatch())
+        return future
+
+    def clear(self, book_id: UUID):
+        for key in [key for key in self._cache if key[1] == book_id]:
+            del self._cache[key]
+
+    async def load_many(self, book_ids: Iterable[UUID], loader=BOOK_LIST_LOADER) -> List:
+        return list(await asyncio.gather(*(self.load(book_id, loader) for book_id in book_ids)))
+
+    async def _dispatch(self):
+        await asyncio.sleep(0)
+        self._dispatch_task = None
+        queue, self._queue = self._queue, {}
+        # The session cannot run two statements at once; batches take turns.
+        async with self._lock:
+            for loader_key, futures in queue.items():
+                self.batches += 1
+                try:
+                    books = await self.book_service.get_books_by_ids(
+                        list(futures), self.session, loader=self._loaders[loader_key]
+                    )
+                except Exception as e:
+                    for book_id, future in futures.items():
+                        self._cache.pop((loader_key, book_id), None)
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for book_id, future in futures.items():
+                    if not future.done():
+                        future.set_result(books.get(book_id))
+
+
+async def use_book_loader(session: AsyncSession = Depends(get_session)):
+    book_loader = BookLoader(session)
+    token = current_book_loader.set(book_loader)
+    try:
+        yield book_loader
+    finally:
+        current_book_loader.reset(token)
@@ -0,0 +1,36 @@
+import hashlib
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from src.pagination import Page
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def book_detail_etag(book_id: UUID, update_at: datetime, stats_update_at: Optional[datetime]) -> str:
+    """Every review write touches ``book_stats.update_at``, so it versions the embedded reviews."""
+    return make_etag("book", book_id, update_at.isoformat(), stats_update_at.isoformat() if stats_update_at else "")
+
+
+def book_page_etag(page: Page) -> str:
+    """Each book's ``update_at`` plus the rating summary embedded with it in the list body."""
+    parts = [f"{book.id}@{book.update_at.isoformat()}{_summary_part(book.stats)}" for book in page.items]
+    return make_etag("page", page.next_cursor or "", *parts)
+
+
+def _summary_part(stats) -> str:
+    return f"#{stats.review_count}/{stats.average_rating}" if stats is not None else ""
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against ``etag`` (weak comparison, RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return etag in (candidate.removeprefix("W/") for candidate in candidates)
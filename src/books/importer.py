@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from itertools import islice
+from typing import BinaryIO, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .bloom import book_id_filter
+from .models import Book
+from .schemas import BookCreateRequest, BookImportError, BookImportResponse
+from .search import book_search_index
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+IMPORT_FORMATS = ("csv", "ndjson")
+INVALID_UTF8 = "Invalid UTF-8"
+COPY_COLUMNS = ("id", "user_id", "title", "author", "description", "created_at", "update_at")
+
+
+def detect_format(filename: str | None, content_type: str | None = None) -> str | None:
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+def iter_rows(stream: BinaryIO, fmt: str) -> Iterator[Tuple[int, dict | None, str | None]]:
+    """Yield ``(row_number, row, error)`` for every record in ``stream``, one at a time.
+
+    A record that is not valid UTF-8, CSV or JSON is yielded as an error and
+    reading carries on with the next one.
+    """
+    # Undecodable bytes become lone surrogates, so they fail the row they are in instead of the stream.
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="surrogateescape", newline="")
+    if fmt == "csv":
+        yield from _iter_csv_rows(text)
+        return
+
+    for row_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        if not _is_utf8(line):
+            yield row_number, None, INVALID_UTF8
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield row_number, None, "Expected a JSON object"
+            continue
+        yield row_number, row, None
+
+
+def _iter_csv_rows(text: io.TextIOWrapper) -> Iterator[Tuple[int, dict | None, str | None]]:
+    reader = csv.DictReader(text)
+    row_number = 0
+    while True:
+        row_number += 1
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            # The reader drops the rest of the bad record and resumes at the next line.
+            yield row_number, None, f"Invalid CSV: {e}"
+            continue
+        if not all(_is_utf8(value) for value in row.values() if isinstance(value, str)):
+            yield row_number, None, INVALID_UTF8
+            continue
+        yield row_number, row, None
+
+
+def _is_utf8(value: str) -> bool:
+    try:
+        value.encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _take(rows: Iterator, size: int) -> list:
+    return list(islice(rows, size))
+
+
+class BookImporter:
+    """Validate and insert books from CSV or NDJSON in fixed-size chunks.
+
+    Only one chunk is held in memory at a time, so the size of the input does
+    not matter. Invalid rows are reported and skipped; the rest of the batch
+    is still written.
+    """
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+    async def import_stream(
+        self, stream: BinaryIO, fmt: str, user_id: uuid.UUID | None, session: AsyncSession
+    ) -> BookImportResponse:
+        report = BookImportResponse(inserted=0, failed=0, errors=[])
+        user_id = uuid.UUID(str(user_id)) if user_id is not None else None
+        rows = iter_rows(stream, fmt)
+        while True:
+            # Parsing is blocking file I/O, keep it off the event loop.
+            chunk = await asyncio.to_thread(_take, rows, self.chunk_size)
+            if not chunk:
+                break
+            records = self._validate(chunk, user_id, report)
+            if records:
+                await self._write(records, session, report)
+        return report
+
+    def _validate(self, chunk: list, user_id: uuid.UUID | None, report: BookImportResponse) -> List[tuple]:
+        records = []
+        now = datetime.now()
+        for row_number, row, error in chunk:
+            if error is None:
+                try:
+                    book = BookCreateRequest.model_validate(row)
+                except ValidationError as e:
+                    error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            if error is not None:
+                self._record_error(report, row_number, error)
+                continue
+            records.append(
+                (row_number, (uuid.uuid4(), user_id, book.title, book.author, book.description, now, now))
+            )
+        return records
+
+    async def _write(self, records: List[tuple], session: AsyncSession, report: BookImportResponse):
+        values = [record for _, record in records]
+        try:
+            if session.bind.dialect.driver == "asyncpg":
+                conn = await session.connection()
+                raw_connection = await conn.get_raw_connection()
+                await raw_connection.driver_connection.copy_records_to_table(
+                    Book.__tablename__, records=values, columns=COPY_COLUMNS
+                )
+            else:
+                statement = insert(Book.__table__).values([dict(zip(COPY_COLUMNS, record)) for record in values])
+                await session.exec(statement)
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            for row_number, _ in records:
+                self._record_error(report, row_number, f"{type(e).__name__}: {str(e).splitlines()[0]}")
+            return
+
+        report.inserted += len(values)
+        for book_id, *_ in values:
+            book_id_filter.add(book_id)
+        if book_search_index.ready:
+            for book_id, _, title, author, description, _, _ in values:
+                book_search_index.add(book_id, title, author, description)
+
+    @staticmethod
+    def _record_error(report: BookImportResponse, row_number: int, message: str):
+        report.failed += 1
+        if len(report.errors) < MAX_REPORTED_ERRORS:
+            report.errors.append(BookImportError(row=row_number, message=message))
+
+
+async def import_file(path: str, fmt: str, user_id: uuid.UUID | None, chunk_size: int) -> BookImportResponse:
+    from src.db.main import async_session_factory
+
+    async with async_session_factory() as session:
+        with open(path, "rb") as stream:
+            return await BookImporter(chunk_size).import_stream(stream, fmt, user_id, session)
+
+
+def main(argv: List[str] | None = None):
+    parser = argparse.ArgumentParser(description="Bulk import books from a CSV or NDJSON file.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, dest="fmt")
+    parser.add_argument("--user-id", type=uuid.UUID, default=None)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    fmt = args.fmt or detect_format(args.path)
+    if fmt is None:
+        parser.error("could not infer the file format, pass --format")
+
+    report = asyncio.run(import_file(args.path, fmt, args.user_id, args.chunk_size))
+    print(report.model_dump_json(indent=2))
+    return 0 if report.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
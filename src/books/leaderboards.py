@@ -0,0 +1,157 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from redis.exceptions import RedisError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.redis import redis_client
+
+from .models import BookStats, Review
+
+logger = logging.getLogger(__name__)
+
+TOP_KEY = "bookly:books:top"
+TRENDING_PREFIX = "bookly:books:trending"
+BUCKET_SECONDS = 60 * 60
+# The windowed union is recomputed at most this often per bucket.
+TRENDING_UNION_TTL = 60
+
+
+def hour_bucket(at: datetime) -> int:
+    return int(at.timestamp()) // BUCKET_SECONDS
+
+
+def average_rating(review_count: int, rating_sum: int) -> float:
+    return round(rating_sum / review_count, 2)
+
+
+class BookLeaderboards:
+    """Top-rated and trending books kept in Redis sorted sets.
+
+    ``bookly:books:top`` scores every book with at least ``min_reviews``
+    reviews by its average rating. Trending counts reviews in hourly buckets
+    (``bookly:books:trending:{hour}``); a read sums the buckets of the last
+    ``window_hours`` with ZUNIONSTORE and caches the union briefly.
+
+    Review writes update the sets after commit, so a Redis failure never
+    fails the write; the periodic `rebuild` repairs any drift.
+    """
+
+    def __init__(self, client, min_reviews: int, window_hours: int):
+        self.client = client
+        self.min_reviews = min_reviews
+        self.window_hours = window_hours
+
+    def bucket_key(self, bucket: int) -> str:
+        return f"{TRENDING_PREFIX}:{bucket}"
+
+    def window_buckets(self, now: datetime) -> range:
+        current = hour_bucket(now)
+        return range(current - self.window_hours + 1, current + 1)
+
+    async def record_review(
+        self, book_id: UUID, review_count: int, rating_sum: int, reviewed_at: datetime, delta: int = 1
+    ) -> None:
+        member = str(book_id)
+        bucket = hour_bucket(reviewed_at)
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                if review_count >= self.min_reviews:
+                    pipe.zadd(TOP_KEY, {member: average_rating(review_count, rating_sum)})
+                else:
+                    pipe.zrem(TOP_KEY, member)
+                if bucket in self.window_buckets(datetime.now()):
+                    pipe.zincrby(self.bucket_key(bucket), delta, member)
+                    pipe.expire(self.bucket_key(bucket), (self.window_hours + 1) * BUCKET_SECONDS)
+                await pipe.execute()
+        except RedisError:
+            logger.warning("Leaderboard update failed for %s", book_id, exc_info=True)
+
+    async def remove(self, book_id: UUID) -> None:
+        member = str(book_id)
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.zrem(TOP_KEY, member)
+                for bucket in self.window_buckets(datetime.now()):
+                    pipe.zrem(self.bucket_key(bucket), member)
+                await pipe.execute()
+        except RedisError:
+            logger.warning("Leaderboard removal failed for %s", book_id, exc_info=True)
+
+    async def _ranked(self, key: str, limit: int) -> List[Tuple[UUID, float]]:
+        members = await self.client.zrevrangebyscore(key, "+inf", "(0", start=0, num=limit, withscores=True)
+        return [(UUID(member.decode()), score) for member, score in members]
+
+    async def top(self, limit: int) -> List[Tuple[UUID, float]]:
+        try:
+            return await self._ranked(TOP_KEY, limit)
+        except RedisError:
+            logger.warning("Top books read failed", exc_info=True)
+            return []
+
+    async def trending(self, limit: int, now: datetime | None = None) -> List[Tuple[UUID, float]]:
+        buckets = self.window_buckets(now or datetime.now())
+        union_key = f"{TRENDING_PREFIX}:window:{buckets[-1]}"
+        try:
+            if not await self.client.exists(union_key):
+                async with self.client.pipeline(transaction=False) as pipe:
+                    pipe.zunionstore(union_key, [self.bucket_key(bucket) for bucket in buckets])
+                    pipe.expire(union_key, TRENDING_UNION_TTL)
+                    await pipe.execute()
+            return await self._ranked(union_key, limit)
+        except RedisError:
+            logger.warning("Trending books read failed", exc_info=True)
+            return []
+
+    async def rebuild(self, session: AsyncSession, now: datetime | None = None) -> Dict[str, int]:
+        """Recompute every sorted set from `book_stats` and `reviews`."""
+        now = now or datetime.now()
+        top_statement = select(BookStats.book_id, BookStats.review_count, BookStats.rating_sum).where(
+            BookStats.review_count >= self.min_reviews
+        )
+        top = {
+            str(book_id): average_rating(review_count, rating_sum)
+            for book_id, review_count, rating_sum in (await session.exec(top_statement)).all()
+        }
+
+        buckets = self.window_buckets(now)
+        since = datetime.fromtimestamp(buckets[0] * BUCKET_SECONDS)
+        trending: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        statement = select(Review.book_id, Review.created_at).where(
+            Review.created_at >= since, Review.book_id.is_not(None)
+        )
+        result = await session.stream(statement.execution_options(yield_per=1000))
+        async for book_id, created_at in result:
+            trending[hour_bucket(created_at)][str(book_id)] += 1
+
+        # Build each set under a scratch key and swap it in, so readers never see a partial set.
+        async with self.client.pipeline(transaction=True) as pipe:
+            for key, members, ttl in (
+                (TOP_KEY, top, None),
+                *(
+                    (self.bucket_key(bucket), trending.get(bucket, {}), (self.window_hours + 1) * BUCKET_SECONDS)
+                    for bucket in buckets
+                ),
+            ):
+                if not members:
+                    pipe.delete(key)
+                    continue
+                scratch = f"{key}:rebuild"
+                pipe.delete(scratch)
+                pipe.zadd(scratch, members)
+                pipe.rename(scratch, key)
+                if ttl is not None:
+                    pipe.expire(key, ttl)
+            pipe.delete(f"{TRENDING_PREFIX}:window:{buckets[-1]}")
+            await pipe.execute()
+        return {"top": len(top), "trending": len(set().union(*trending.values()))}
+
+
+book_leaderboards = BookLeaderboards(
+    redis_client, min_reviews=Config.TOP_BOOKS_MIN_REVIEWS, window_hours=Config.TRENDING_WINDOW_HOURS
+)
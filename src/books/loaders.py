@@ -0,0 +1,25 @@
+from sqlalchemy.orm import joinedload, load_only, raiseload
+
+from .models import Book
+
+# Columns serialized by the `Book` list schema; nothing else is fetched for listings.
+BOOK_LIST_COLUMNS = (
+    Book.id,
+    Book.title,
+    Book.author,
+    Book.description,
+    Book.created_at,
+    Book.update_at,
+)
+
+# Listings load the schema columns and the one-row rating stats in a single
+# query, and refuse any other relationship load.
+BOOK_LIST_LOADER = (
+    load_only(*BOOK_LIST_COLUMNS, raiseload=True),
+    joinedload(Book.stats),
+    raiseload("*"),
+)
+
+# Detail views load the full row with its stats; the embedded reviews are a
+# separate first page from `ReviewService.get_book_reviews`.
+BOOK_DETAIL_LOADER = (joinedload(Book.stats), raiseload("*"))
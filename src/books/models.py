@@ -2,13 +2,18 @@ from sqlmodel import SQLModel, Field, Column, String, Relationship
 from datetime import datetime
 import uuid
 import sqlalchemy.dialects.postgresql as pg
-from typing import List, Optional
-from sqlalchemy import ForeignKey
+from typing import Dict, List, Optional
+from sqlalchemy import ForeignKey, Index, Integer
 from src.auth import models
 
 
 class Book(SQLModel, table=True):
     __tablename__ = "books"
+    # Match the keyset order of the book listings, (created_at, id) descending.
+    __table_args__ = (
+        Index("ix_books_created_at_id", "created_at", "id"),
+        Index("ix_books_user_id_created_at", "user_id", "created_at", "id"),
+    )
 
     id: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
@@ -35,23 +40,82 @@ class Book(SQLModel, table=True):
         )
     )
     created_at: datetime = Field(
-        sa_column=Column(pg.TIMESTAMP, nullable=False, default_factory=datetime.now)
+        sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now)
     )
     update_at: datetime = Field(
-        sa_column=Column(pg.TIMESTAMP, nullable=False, default_factory=datetime.now)
+        sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now)
     )
 
     user: Optional["models.User"] = Relationship(back_populates="books")
     reviews: List["Review"] = Relationship(
-        back_populates="book", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="book",
+        sa_relationship_kwargs={"lazy": "selectin", "passive_deletes": True},
+    )
+    stats: Optional["BookStats"] = Relationship(
+        back_populates="book",
+        sa_relationship_kwargs={"uselist": False, "lazy": "joined", "passive_deletes": True},
     )
 
     def __repr__(self):
         return f"<Book {self.title}>"
 
 
+MIN_RATING = 1
+MAX_RATING = 5
+RATINGS = range(MIN_RATING, MAX_RATING + 1)
+
+
+def counter_column():
+    return Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class BookStats(SQLModel, table=True):
+    """Review aggregates of a book, maintained in the same transaction as review writes."""
+
+    __tablename__ = "book_stats"
+
+    book_id: uuid.UUID = Field(
+        sa_column=Column(
+            pg.UUID(as_uuid=True),
+            ForeignKey("books.id", ondelete="CASCADE"),
+            primary_key=True,
+        )
+    )
+    review_count: int = Field(sa_column=counter_column())
+    rating_sum: int = Field(sa_column=counter_column())
+    stars_1: int = Field(sa_column=counter_column())
+    stars_2: int = Field(sa_column=counter_column())
+    stars_3: int = Field(sa_column=counter_column())
+    stars_4: int = Field(sa_column=counter_column())
+    stars_5: int = Field(sa_column=counter_column())
+    update_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now)
+    )
+
+    book: Optional[Book] = Relationship(back_populates="stats")
+
+    @property
+    def average_rating(self) -> Optional[float]:
+        if not self.review_count:
+            return None
+        return round(self.rating_sum / self.review_count, 2)
+
+    @property
+    def histogram(self) -> Dict[int, int]:
+        return {rating: getattr(self, f"stars_{rating}") for rating in RATINGS}
+
+    def __repr__(self):
+        return f"<BookStats {self.book_id}: {self.review_count} reviews>"
+
+
 class Review(SQLModel, table=True):
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index("ix_reviews_book_id_created_at", "book_id", "created_at", "id"),
+        Index("ix_reviews_book_id_rating", "book_id", "rating", "created_at", "id"),
+        Index("ix_reviews_user_id", "user_id"),
+        Index("ix_reviews_created_at", "created_at"),
+    )
 
     id: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
@@ -60,7 +124,11 @@ class Review(SQLModel, table=True):
         sa_column=Column(pg.UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     )
     book_id: Optional[uuid.UUID] = Field(
-        sa_column=Column(pg.UUID(as_uuid=True), ForeignKey("books.id"), nullable=True)
+        sa_column=Column(
+            pg.UUID(as_uuid=True),
+            ForeignKey("books.id", ondelete="SET NULL"),
+            nullable=True,
+        )
     )
     review_text: str = Field(
         sa_column=Column(
@@ -68,7 +136,7 @@ class Review(SQLModel, table=True):
             nullable=False,
         )
     )
-    rating: int = Field(lt=5)
+    rating: int = Field(ge=MIN_RATING, le=MAX_RATING)
 
     created_at: datetime = Field(
         sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now)
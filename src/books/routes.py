@@ -1,31 +1,51 @@
+from datetime import datetime
 from uuid import UUID
-from fastapi import APIRouter, Depends
-from typing import List
+from fastapi import APIRouter, Depends, File, Header, Query, UploadFile
+from typing import List, Optional
 
 from fastapi import status, HTTPException
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from fastapi.responses import Response, StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 from .schemas import (
+    BookBatchRequest,
+    BookBatchResponse,
     BookCreateRequest,
     BookCreateResponse,
     BookDetailResponse,
     BookEditRequest,
     Book,
+    BookImportResponse,
+    BookPage,
+    RankedBook,
 )
 
 
+from src.books.dataloader import BookLoader, use_book_loader
+from src.books.etags import book_page_etag, etag_matches
+from src.books.importer import IMPORT_FORMATS, BookImporter, detect_format
 from src.books.services import BookService
-from src.db.main import get_session
+from src.db.main import async_session_factory, get_session
+from src.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from src.auth.dependencies import AccessTokenBearer, RoleChecker
 
-book_routes = APIRouter()
+book_routes = APIRouter(dependencies=[Depends(use_book_loader)])
 book_service = BookService()
 access_token_bearer = AccessTokenBearer()
 role_checker = Depends(RoleChecker(["user"]))
+admin_role_checker = Depends(RoleChecker(["admin"]))
+EXPORT_FLUSH_ROWS = 500
+LEADERBOARD_SIZE = 10
+MAX_LEADERBOARD_SIZE = 50
 
 
-async def get_book_by_id(book_id: UUID, session):
-    book = await book_service.get_book_by_id(book_id, session)
-    return book
+def conditional_page(page, response: Response, if_none_match: Optional[str]):
+    etag = book_page_etag(page)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return page
 
 
 @book_routes.post(
@@ -44,31 +64,176 @@ async def add_book(
     return new_book
 
 
+@book_routes.post(
+    "/import",
+    response_model=BookImportResponse,
+    status_code=status.HTTP_200_OK,
+    dependencies=[admin_role_checker],
+)
+async def import_books(
+    file: UploadFile = File(...),
+    fmt: Optional[str] = Query(None, alias="format", pattern=f"^({'|'.join(IMPORT_FORMATS)})$"),
+    session: AsyncSession = Depends(get_session),
+    token_info=Depends(access_token_bearer),
+):
+    fmt = fmt or detect_format(file.filename, file.content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not infer the file format, pass ?format=csv or ?format=ndjson",
+        )
+    user_id = token_info.get("user")["user_id"]
+    return await BookImporter().import_stream(file.file, fmt, user_id, session)
+
+
 @book_routes.get(
     "/",
-    response_model=List[Book],
+    response_model=BookPage,
     status_code=status.HTTP_200_OK,
     dependencies=[role_checker],
 )
 async def get_all_books(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_session),
+    token_info=Depends(access_token_bearer),
+):
+    page = await book_service.get_all_books(session, limit, cursor)
+    return conditional_page(page, response, if_none_match)
+
+
+async def get_books_batch(batch: BookBatchRequest, book_loader: BookLoader):
+    book_ids = list(dict.fromkeys(batch.ids))
+    books = await book_loader.load_many(book_ids)
+    return {
+        "items": [book for book in books if book is not None],
+        "missing": [book_id for book_id, book in zip(book_ids, books) if book is None],
+    }
+
+
+@book_routes.get(
+    "/batch",
+    response_model=BookBatchResponse,
+    status_code=status.HTTP_200_OK,
+    dependencies=[role_checker],
+)
+async def get_books_batch_by_query(
+    ids: str = Query(description="Comma separated book ids"),
+    book_loader: BookLoader = Depends(use_book_loader),
+    token_info=Depends(access_token_bearer),
+):
+    try:
+        batch = BookBatchRequest(ids=[book_id.strip() for book_id in ids.split(",") if book_id.strip()])
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    return await get_books_batch(batch, book_loader)
+
+
+@book_routes.post(
+    "/batch",
+    response_model=BookBatchResponse,
+    status_code=status.HTTP_200_OK,
+    dependencies=[role_checker],
+)
+async def get_books_batch_by_body(
+    batch: BookBatchRequest,
+    book_loader: BookLoader = Depends(use_book_loader),
+    token_info=Depends(access_token_bearer),
+):
+    return await get_books_batch(batch, book_loader)
+
+
+@book_routes.get(
+    "/export",
+    status_code=status.HTTP_200_OK,
+    dependencies=[role_checker],
+    response_class=StreamingResponse,
+)
+async def export_books(
+    user_id: Optional[UUID] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    token_info=Depends(access_token_bearer),
+):
+    # The request-scoped session is closed before a streaming body is sent,
+    # so the export owns its session for the lifetime of the stream.
+    async def generate_lines():
+        async with async_session_factory() as session:
+            lines = []
+            async for row in book_service.stream_books(session, user_id, created_after, created_before):
+                lines.append(Book.model_validate(row, from_attributes=True).model_dump_json())
+                if len(lines) >= EXPORT_FLUSH_ROWS:
+                    yield "\n".join(lines) + "\n"
+                    lines.clear()
+            if lines:
+                yield "\n".join(lines) + "\n"
+
+    return StreamingResponse(generate_lines(), media_type="application/x-ndjson")
+
+
+@book_routes.get(
+    "/search",
+    response_model=BookPage,
+    status_code=status.HTTP_200_OK,
+    dependencies=[role_checker],
+)
+async def search_books(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+    token_info=Depends(access_token_bearer),
+):
+    return await book_service.search_books(q, session, limit, cursor)
+
+
+@book_routes.get(
+    "/top",
+    response_model=List[RankedBook],
+    status_code=status.HTTP_200_OK,
+    dependencies=[role_checker],
+)
+async def get_top_books(
+    limit: int = Query(LEADERBOARD_SIZE, ge=1, le=MAX_LEADERBOARD_SIZE),
     session: AsyncSession = Depends(get_session),
     token_info=Depends(access_token_bearer),
 ):
-    return await book_service.get_all_books(session)
+    return await book_service.get_top_books(session, limit)
+
+
+@book_routes.get(
+    "/trending",
+    response_model=List[RankedBook],
+    status_code=status.HTTP_200_OK,
+    dependencies=[role_checker],
+)
+async def get_trending_books(
+    limit: int = Query(LEADERBOARD_SIZE, ge=1, le=MAX_LEADERBOARD_SIZE),
+    session: AsyncSession = Depends(get_session),
+    token_info=Depends(access_token_bearer),
+):
+    return await book_service.get_trending_books(session, limit)
 
 
 @book_routes.get(
     "/users/{user_id}",
-    response_model=List[Book],
+    response_model=BookPage,
     status_code=status.HTTP_200_OK,
     dependencies=[role_checker],
 )
 async def get_user_books(
     user_id: UUID,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
     session: AsyncSession = Depends(get_session),
     token_info=Depends(access_token_bearer),
 ):
-    return await book_service.get_all_books_by_user(user_id, session)
+    page = await book_service.get_all_books_by_user(user_id, session, limit, cursor)
+    return conditional_page(page, response, if_none_match)
 
 
 @book_routes.get(
@@ -79,15 +244,19 @@ async def get_user_books(
 )
 async def get_book(
     book_id: UUID,
+    if_none_match: Optional[str] = Header(None),
     session: AsyncSession = Depends(get_session),
     token_info=Depends(access_token_bearer),
 ):
-    book = await get_book_by_id(book_id, session)
-    if not book:
+    detail = await book_service.get_book_detail(book_id, session, if_none_match)
+    if detail is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="No book with matching id"
         )
-    return book
+    headers = {"ETag": detail.etag}
+    if detail.body is None or etag_matches(if_none_match, detail.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=detail.body, media_type="application/json", headers=headers)
 
 
 @book_routes.patch(
@@ -1,8 +1,9 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
+from src.pagination import Page
 from src.reviews.schemas import Review
 
 
@@ -12,17 +13,40 @@ class BookCreateRequest(BaseModel):
     description: str
 
 
-class Book(BookCreateRequest):
+class BookRatingSummary(BaseModel):
+    review_count: int
+    average_rating: Optional[float] = None
+
+
+class BookRatingStats(BookRatingSummary):
+    histogram: Dict[int, int]
+
+
+class BookBase(BookCreateRequest):
     id: UUID
     created_at: datetime
     update_at: datetime
 
 
-class BookDetailResponse(Book):
+class Book(BookBase):
+    stats: Optional[BookRatingSummary] = None
+
+
+class BookPage(Page[Book]): ...
+
+
+class RankedBook(BaseModel):
+    book: Book
+    score: float
+
+
+class BookDetailResponse(BookBase):
+    stats: Optional[BookRatingStats] = None
     reviews: List[Review]
+    reviews_next_cursor: Optional[str] = None
 
 
-class BookCreateResponse(Book):
+class BookCreateResponse(BookBase):
     ...
     # class Config:
     #     orm_mode = True
@@ -34,4 +58,27 @@ class BookEditRequest(BaseModel):
     description: Optional[str] = None
 
 
-class BookEditResponse(Book): ...
+class BookEditResponse(BookBase): ...
+
+
+MAX_BATCH_IDS = 100
+
+
+class BookBatchRequest(BaseModel):
+    ids: List[UUID] = Field(min_length=1, max_length=MAX_BATCH_IDS)
+
+
+class BookBatchResponse(BaseModel):
+    items: List[Book]
+    missing: List[UUID]
+
+
+class BookImportError(BaseModel):
+    row: int
+    message: str
+
+
+class BookImportResponse(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BookImportError]
@@ -0,0 +1,90 @@
+import math
+import re
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+from uuid import UUID
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .models import Book
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STOP_WORDS = frozenset({"a", "an", "and", "in", "of", "on", "or", "the", "to"})
+
+# Same relative weights as the setweight() labels of books.search_vector.
+FIELD_WEIGHTS = {"title": 1.0, "author": 0.4, "description": 0.2}
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+class InvertedIndex:
+    """In-process full-text index used when the database is not Postgres.
+
+    Maps each token to the books containing it with a field-weighted term
+    frequency. A query matches books that contain every query token and is
+    ranked by the summed tf-idf of those tokens.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[UUID, float]] = defaultdict(dict)
+        self.documents: Dict[UUID, Set[str]] = {}
+        self.ready = False
+
+    def clear(self):
+        self.postings.clear()
+        self.documents.clear()
+        self.ready = False
+
+    def add(self, book_id: UUID, title: str, author: str, description: str):
+        self.remove(book_id)
+        weights: Dict[str, float] = defaultdict(float)
+        for field, text in (("title", title), ("author", author), ("description", description)):
+            for token in tokenize(text or ""):
+                weights[token] += FIELD_WEIGHTS[field]
+        for token, weight in weights.items():
+            self.postings[token][book_id] = weight
+        self.documents[book_id] = set(weights)
+
+    def remove(self, book_id: UUID):
+        for token in self.documents.pop(book_id, ()):
+            postings = self.postings[token]
+            postings.pop(book_id, None)
+            if not postings:
+                del self.postings[token]
+
+    def search(self, query: str) -> List[Tuple[UUID, float]]:
+        tokens = set(tokenize(query))
+        if not tokens or any(token not in self.postings for token in tokens):
+            return []
+
+        # Intersect starting from the rarest token to keep the candidate set small.
+        ordered = sorted(tokens, key=lambda token: len(self.postings[token]))
+        candidates = set(self.postings[ordered[0]])
+        for token in ordered[1:]:
+            candidates &= self.postings[token].keys()
+            if not candidates:
+                return []
+
+        total = len(self.documents)
+        scores = {}
+        for book_id in candidates:
+            score = 0.0
+            for token in tokens:
+                postings = self.postings[token]
+                score += postings[book_id] * (1 + math.log(total / len(postings)))
+            scores[book_id] = score
+        return sorted(scores.items(), key=lambda item: (-item[1], str(item[0])))
+
+    async def build(self, session: AsyncSession):
+        self.clear()
+        statement = select(Book.id, Book.title, Book.author, Book.description)
+        result = await session.stream(statement.execution_options(yield_per=1000))
+        async for book_id, title, author, description in result:
+            self.add(book_id, title, author, description)
+        self.ready = True
+
+
+book_search_index = InvertedIndex()
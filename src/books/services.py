@@ -1,30 +1,246 @@
+from datetime import datetime
+from typing import AsyncIterator, List, NamedTuple, Optional
 from uuid import UUID
+from sqlalchemy import any_, bindparam, cast, delete, func, literal_column, update
+from sqlalchemy.dialects.postgresql import ARRAY, REGCONFIG, TSVECTOR, UUID as PG_UUID
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select, desc
-from .models import Book
+from sqlmodel import select
+from src.reviews.services import ReviewService
+from src.db.main import async_session_factory
+from src.singleflight import SingleFlight
+from src.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    cursor_offset,
+    keyset_paginate,
+    next_offset_cursor,
+)
+from .bloom import book_id_filter
+from .cache import book_cache
+from .dataloader import current_book_loader
+from .etags import book_detail_etag, etag_matches
+from .leaderboards import book_leaderboards
+from .loaders import BOOK_DETAIL_LOADER, BOOK_LIST_COLUMNS, BOOK_LIST_LOADER
+from .models import Book, BookStats
+from .schemas import BookBase, BookDetailResponse, BookPage
+from .search import book_search_index
 from .schemas import BookCreateRequest, BookEditRequest
 
+class BookDetailPayload(NamedTuple):
+    etag: str
+    # None when the client's If-None-Match already matches `etag`.
+    body: Optional[bytes]
+
+
+BOOK_KEYSET = (Book.created_at, Book.id)
+EXPORT_BATCH_SIZE = 1000
+# Reviews embedded in the detail response; the rest come from GET /reviews/book/{id}.
+REVIEW_PREVIEW_SIZE = DEFAULT_PAGE_SIZE
+
+# Concurrent identical reads share one query. The query runs in a session of
+# its own and returns schema pages or detail payloads, never ORM instances, so
+# no caller depends on another request's session staying open.
+book_reads = SingleFlight()
+review_service = ReviewService()
+
+# Generated tsvector column created by migration 381bd0f3ab86; not mapped on the model
+# so that other backends can still create the table.
+BOOK_SEARCH_VECTOR = literal_column("books.search_vector", TSVECTOR)
+
 
 class BookService:
-    async def get_all_books(self, session: AsyncSession):
-        statement = select(Book).order_by(desc(Book.created_at))
-        result = await session.exec(statement)
-        return result.all()
+    async def get_all_books(
+        self,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
+        statement = select(Book).options(*BOOK_LIST_LOADER)
+        return await self._shared_read(("all_books", limit, cursor), session, self._book_page, statement, limit, cursor)
+
+    async def get_all_books_by_user(
+        self,
+        user_id: UUID,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
+        statement = select(Book).where(Book.user_id == user_id).options(*BOOK_LIST_LOADER)
+        return await self._shared_read(
+            ("user_books", user_id, limit, cursor), session, self._book_page, statement, limit, cursor
+        )
+
+    async def _shared_read(self, key, session: AsyncSession, fn, *args):
+        """Run ``fn(own_session, *args)`` once for all concurrent callers with ``key``."""
+        if session.in_transaction():
+            # End the caller's read transaction first, so a request never holds one pooled
+            # connection while waiting for another and a full pool cannot deadlock.
+            await session.commit()
+        return await book_reads.do(key, self._in_own_session, session.bind, fn, *args)
+
+    @staticmethod
+    async def _in_own_session(bind, fn, *args):
+        # Same engine as the caller, but a session that lives exactly as long as the shared query.
+        async with async_session_factory(bind=bind) as session:
+            return await fn(session, *args)
+
+    async def _book_page(self, session: AsyncSession, statement, limit: int, cursor: Optional[str]) -> BookPage:
+        page = await keyset_paginate(session, statement, BOOK_KEYSET, limit, cursor)
+        return BookPage.model_validate(page, from_attributes=True)
 
-    async def get_all_books_by_user(self, user_id: UUID, session: AsyncSession):
+    async def stream_books(
+        self,
+        session: AsyncSession,
+        user_id: Optional[UUID] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> AsyncIterator:
+        """Yield book rows through a server-side cursor, `EXPORT_BATCH_SIZE` rows per fetch."""
+        statement = select(*BOOK_LIST_COLUMNS)
+        if user_id is not None:
+            statement = statement.where(Book.user_id == user_id)
+        if created_after is not None:
+            statement = statement.where(Book.created_at >= created_after)
+        if created_before is not None:
+            statement = statement.where(Book.created_at < created_before)
+        statement = statement.order_by(Book.created_at, Book.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+        result = await session.stream(statement)
+        async for row in result:
+            yield row
+
+    async def search_books(
+        self,
+        query: str,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        return await self._shared_read(
+            ("search", query, limit, cursor), session, self._search_books, query, limit, cursor
+        )
+
+    async def _search_books(self, session: AsyncSession, query: str, limit: int, cursor: Optional[str]) -> BookPage:
+        offset = cursor_offset(cursor)
+        if session.bind.dialect.name == "postgresql":
+            books = await self._search_postgres(query, session, limit + 1, offset)
+        else:
+            books = await self._search_in_process(query, session, limit + 1, offset)
+        return BookPage.model_validate(
+            {"items": books[:limit], "next_cursor": next_offset_cursor(offset, limit, len(books) > limit)},
+            from_attributes=True,
+        )
+
+    async def _search_postgres(self, query: str, session: AsyncSession, limit: int, offset: int):
+        ts_query = func.websearch_to_tsquery(cast("english", REGCONFIG), query)
+        rank = func.ts_rank_cd(BOOK_SEARCH_VECTOR, ts_query)
         statement = (
-            select(Book).where(Book.user_id == user_id).order_by(desc(Book.created_at))
+            select(Book)
+            .options(*BOOK_LIST_LOADER)
+            .where(BOOK_SEARCH_VECTOR.op("@@")(ts_query))
+            .order_by(rank.desc(), Book.id)
+            .offset(offset)
+            .limit(limit)
         )
         result = await session.exec(statement)
         return result.all()
 
-    async def get_book_by_id(self, book_id: UUID, session: AsyncSession):
-        statement = select(Book).where(Book.id == book_id)
+    async def _search_in_process(self, query: str, session: AsyncSession, limit: int, offset: int):
+        if not book_search_index.ready:
+            await book_search_index.build(session)
+        book_ids = [book_id for book_id, _ in book_search_index.search(query)[offset : offset + limit]]
+        if not book_ids:
+            return []
+        statement = select(Book).options(*BOOK_LIST_LOADER).where(Book.id.in_(book_ids))
+        result = await session.exec(statement)
+        books = {book.id: book for book in result.all()}
+        return [books[book_id] for book_id in book_ids if book_id in books]
+
+    async def get_books_by_ids(self, book_ids: List[UUID], session: AsyncSession, loader=BOOK_LIST_LOADER):
+        if not book_ids:
+            return {}
+        if session.bind.dialect.name == "postgresql":
+            # One array parameter keeps the statement text (and its prepared plan) the same for any batch size.
+            ids = bindparam("book_ids", list(book_ids), type_=ARRAY(PG_UUID(as_uuid=True)))
+            condition = Book.id == any_(ids)
+        else:
+            condition = Book.id.in_(book_ids)
+        result = await session.exec(select(Book).where(condition).options(*loader))
+        return {book.id: book for book in result.all()}
+
+    async def get_top_books(self, session: AsyncSession, limit: int):
+        return await self._ranked_books(await book_leaderboards.top(limit), session)
+
+    async def get_trending_books(self, session: AsyncSession, limit: int):
+        return await self._ranked_books(await book_leaderboards.trending(limit), session)
+
+    async def _ranked_books(self, ranking, session: AsyncSession):
+        books = await self.get_books_by_ids([book_id for book_id, _ in ranking], session)
+        return [{"book": books[book_id], "score": score} for book_id, score in ranking if book_id in books]
+
+    async def get_book_by_id(
+        self, book_id: UUID, session: AsyncSession, loader=BOOK_DETAIL_LOADER
+    ):
+        book_loader = current_book_loader.get()
+        if book_loader is not None and book_loader.session is session:
+            return await book_loader.load(book_id, loader)
+
+        statement = select(Book).where(Book.id == book_id).options(*loader)
         result = await session.exec(statement)
         if not result:
             return None
         return result.first()
 
+    async def get_book_detail_etag(self, book_id: UUID, session: AsyncSession) -> str | None:
+        statement = (
+            select(Book.update_at, BookStats.update_at)
+            .outerjoin(BookStats, BookStats.book_id == Book.id)
+            .where(Book.id == book_id)
+        )
+        result = await session.exec(statement)
+        row = result.first()
+        if row is None:
+            return None
+        return book_detail_etag(book_id, *row)
+
+    async def get_book_detail(
+        self, book_id: UUID, session: AsyncSession, if_none_match: Optional[str] = None
+    ) -> BookDetailPayload | None:
+        cached = await book_cache.get_detail(book_id)
+        if cached is not None:
+            etag, _, body = cached.partition(b"\n")
+            return BookDetailPayload(etag.decode(), body)
+
+        if if_none_match:
+            # Answer a conditional request from the timestamps alone, without loading reviews.
+            etag = await self.get_book_detail_etag(book_id, session)
+            if etag is None:
+                return None
+            if etag_matches(if_none_match, etag):
+                return BookDetailPayload(etag, None)
+
+        return await self._shared_read(("book_detail", book_id), session, self._load_book_detail, book_id)
+
+    async def _load_book_detail(self, session: AsyncSession, book_id: UUID) -> BookDetailPayload | None:
+        book = await self.get_book_by_id(book_id, session, loader=BOOK_DETAIL_LOADER)
+        if book is None:
+            return None
+        reviews = await review_service.get_book_reviews(book_id, session, limit=REVIEW_PREVIEW_SIZE)
+        etag = book_detail_etag(book.id, book.update_at, book.stats.update_at if book.stats else None)
+        detail = BookDetailResponse.model_validate(
+            {
+                **BookBase.model_validate(book, from_attributes=True).model_dump(),
+                "stats": book.stats,
+                "reviews": reviews.items,
+                "reviews_next_cursor": reviews.next_cursor,
+            },
+            from_attributes=True,
+        )
+        body = detail.model_dump_json().encode()
+        await book_cache.set_detail(book_id, etag.encode() + b"\n" + body)
+        return BookDetailPayload(etag, body)
+
     async def create_book(
         self, book_data: BookCreateRequest, user_id: UUID, session: AsyncSession
     ):
@@ -33,26 +249,55 @@ class BookService:
         new_book.user_id = user_id
         session.add(new_book)
         await session.commit()
+        book_id_filter.add(new_book.id)
+        if book_search_index.ready:
+            book_search_index.add(new_book.id, new_book.title, new_book.author, new_book.description)
         return new_book
 
     async def update_book(
         self, book_id: UUID, book_data: BookEditRequest, session: AsyncSession
     ):
-        book = await self.get_book_by_id(book_id, session)
-        if not book:
+        # Only the fields the client sent are written, in a single UPDATE ... RETURNING.
+        book_data_dict = book_data.model_dump(exclude_unset=True, exclude_none=True)
+        statement = (
+            update(Book)
+            .where(Book.id == book_id)
+            .values(**book_data_dict, update_at=datetime.now())
+            .returning(*BOOK_LIST_COLUMNS)
+            .execution_options(synchronize_session="fetch")
+        )
+        result = await session.exec(statement)
+        book = result.first()
+        await session.commit()
+        if book is None:
             return None
 
-        book_data_dict = book_data.model_dump()
-
-        for key, value in book_data_dict.items():
-            setattr(book, key, value)
-        await session.commit()
+        await self._forget(book_id)
+        if book_search_index.ready:
+            book_search_index.add(book.id, book.title, book.author, book.description)
         return book
 
     async def delete_book_by_id(self, book_id: UUID, session: AsyncSession):
-        book = await self.get_book_by_id(book_id, session)
-        if not book:
-            return None
-        await session.delete(book)
+        # Reviews are detached by the ON DELETE SET NULL foreign key, not by the ORM.
+        statement = (
+            delete(Book)
+            .where(Book.id == book_id)
+            .returning(Book.id)
+            .execution_options(synchronize_session="fetch")
+        )
+        result = await session.exec(statement)
+        deleted = result.first()
         await session.commit()
+        if deleted is None:
+            return None
+
+        await self._forget(book_id)
+        book_search_index.remove(book_id)
+        await book_leaderboards.remove(book_id)
         return {}
+
+    async def _forget(self, book_id: UUID):
+        await book_cache.invalidate(book_id)
+        book_loader = current_book_loader.get()
+        if book_loader is not None:
+            book_loader.clear(book_id)
@@ -0,0 +1,103 @@
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+from uuid import UUID
+
+from sqlalchemy import case, delete, func, literal, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .cache import book_cache
+from .models import RATINGS, BookStats, Review
+
+COUNTER_COLUMNS = ("review_count", "rating_sum", *(f"stars_{rating}" for rating in RATINGS))
+
+
+def upsert_for(session: AsyncSession):
+    dialect = session.bind.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"INSERT ... ON CONFLICT is unsupported on {dialect}")
+
+
+class BookStatsService:
+    """Keeps `book_stats` in step with `reviews`.
+
+    `apply_review` runs inside the caller's transaction and does not commit,
+    so the review write and its aggregate change land together. It returns
+    the book's new ``(review_count, rating_sum)``.
+    """
+
+    async def apply_review(self, book_id: UUID, rating: int, session: AsyncSession, delta: int = 1):
+        totals = await self.apply_reviews([(book_id, rating)], session, delta)
+        return totals[book_id]
+
+    async def apply_reviews(
+        self, reviews: Iterable[Tuple[UUID, int]], session: AsyncSession, delta: int = 1
+    ) -> Dict[UUID, Tuple[int, int]]:
+        """Apply many ``(book_id, rating)`` pairs with one multi-row upsert."""
+        counters: Dict[UUID, dict] = {}
+        for book_id, rating in reviews:
+            values = counters.setdefault(book_id, {column: 0 for column in COUNTER_COLUMNS})
+            values["review_count"] += delta
+            values["rating_sum"] += delta * rating
+            values[f"stars_{rating}"] += delta
+
+        now = datetime.now()
+        insert = upsert_for(session)
+        # Rows in a fixed order so concurrent batches lock book_stats rows in the same order.
+        statement = insert(BookStats).values(
+            [{"book_id": book_id, "update_at": now, **counters[book_id]} for book_id in sorted(counters)]
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[BookStats.book_id],
+            set_={
+                **{column: getattr(BookStats, column) + statement.excluded[column] for column in COUNTER_COLUMNS},
+                "update_at": statement.excluded.update_at,
+            },
+        )
+        result = await session.exec(
+            statement.returning(BookStats.book_id, BookStats.review_count, BookStats.rating_sum)
+        )
+        return {book_id: (review_count, rating_sum) for book_id, review_count, rating_sum in result.all()}
+
+    async def get_stats(self, book_id: UUID, session: AsyncSession):
+        return await session.get(BookStats, book_id)
+
+    async def rebuild(self, session: AsyncSession) -> int:
+        """Recompute every book's aggregates from `reviews` in one transaction.
+
+        Only rows whose counters drifted are written, stamped with the rebuild
+        time so their detail ETags change, and only those books' cached
+        details are dropped. Returns the number of books corrected.
+        """
+        rebuilt_at = literal(datetime.now(), BookStats.__table__.c.update_at.type)
+        aggregates = (
+            select(
+                Review.book_id,
+                func.count(),
+                func.coalesce(func.sum(Review.rating), 0),
+                *(func.sum(case((Review.rating == rating, 1), else_=0)) for rating in RATINGS),
+                rebuilt_at,
+            )
+            .where(Review.book_id.is_not(None))
+            .group_by(Review.book_id)
+        )
+        insert = upsert_for(session)
+        statement = insert(BookStats).from_select(["book_id", *COUNTER_COLUMNS, "update_at"], aggregates)
+        counters = BookStats.__table__.c
+        statement = statement.on_conflict_do_update(
+            index_elements=[BookStats.book_id],
+            set_={column: statement.excluded[column] for column in (*COUNTER_COLUMNS, "update_at")},
+            where=or_(*(counters[column] != statement.excluded[column] for column in COUNTER_COLUMNS)),
+        )
+        corrected = (await session.exec(statement.returning(BookStats.book_id))).scalars().all()
+        reviewed = select(Review.book_id).where(Review.book_id.is_not(None))
+        orphaned = await session.exec(
+            delete(BookStats).where(BookStats.book_id.not_in(reviewed)).returning(BookStats.book_id)
+        )
+        corrected += orphaned.scalars().all()
+        await session.commit()
+        await book_cache.invalidate_many(corrected)
+        return len(corrected)
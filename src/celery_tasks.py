@@ -1,17 +1,92 @@
+import asyncio
+import os
+import threading
 from celery import Celery
+from celery.signals import worker_process_init
 from pydantic import EmailStr
-from asgiref.sync import async_to_sync
-from src import mail
-from src.mail import create_message
+from src.books.leaderboards import book_leaderboards
+from src.books.stats import BookStatsService
+from src.db.main import async_session_factory
+from src.mail import create_message, email_templates, smtp_pool
+from src.outbox import email_outbox
 
 celery_app = Celery()
 celery_app.config_from_object("src.config")
 
 
+class WorkerLoop:
+    """One event loop per worker process, running on a background thread.
+
+    `async_to_sync` runs every call on a fresh loop, so an SMTP session opened
+    by one task could never be reused by the next, and pooled database
+    connections ended up shared between loops. Coroutines submitted here all
+    share one loop that lives as long as the process. The loop is started
+    lazily, after Celery has forked its pool processes.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._get_loop()).result()
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._pid = os.getpid()
+                threading.Thread(target=self._loop.run_forever, name="worker-loop", daemon=True).start()
+            return self._loop
+
+
+worker_loop = WorkerLoop()
+
+
+@worker_process_init.connect
+def compile_email_templates(**kwargs):
+    email_templates.warm()
+
+
 @celery_app.task()
 def send_email(recipients: list[EmailStr], subject: str, body: str):
-    message = create_message(
-        recipients=recipients, subject="Verify your account", body=body
-    )
+    message = create_message(recipients=recipients, subject=subject, body=body)
+    return worker_loop.run(smtp_pool.send([message]))
+
+
+@celery_app.task()
+def send_email_batch(emails: list[dict]):
+    """Send many ``{"recipients", "subject", "body"}`` emails over one SMTP session."""
+    messages = [create_message(**email) for email in emails]
+    return worker_loop.run(smtp_pool.send(messages))
+
 
-    async_to_sync(mail.send_message)(message)
+async def rebuild_book_stats() -> int:
+    async with async_session_factory() as session:
+        return await BookStatsService().rebuild(session)
+
+
+@celery_app.task()
+def reconcile_book_stats():
+    return worker_loop.run(rebuild_book_stats())
+
+
+async def rebuild_book_leaderboards() -> dict:
+    async with async_session_factory() as session:
+        return await book_leaderboards.rebuild(session)
+
+
+@celery_app.task()
+def reconcile_book_leaderboards():
+    return worker_loop.run(rebuild_book_leaderboards())
+
+
+async def drain_email_outbox() -> dict:
+    async with async_session_factory() as session:
+        return await email_outbox.dispatch(session, smtp_pool)
+
+
+@celery_app.task()
+def dispatch_email_outbox():
+    return worker_loop.run(drain_email_outbox())
@@ -1,8 +1,16 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     DB_URL: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
     SECRET_KEY: str
     JWT_ALGORITHM: str
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -16,6 +24,30 @@ class Settings(BaseSettings):
     USE_CREDENTIALS: bool = True
     VALIDATE_CERTS: bool = True
     DOMAIN: str
+    MAIL_TEMPLATE_CACHE_DIR: Optional[str] = None
+    MAIL_POOL_SIZE: int = 2
+    MAIL_POOL_MAX_IDLE_SECONDS: int = 60
+    MAIL_POOL_MAX_MESSAGES: int = 100
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETRY_BASE_SECONDS: int = 30
+    OUTBOX_RETRY_MAX_SECONDS: int = 3600
+    BOOK_CACHE_TTL: int = 300
+    TOP_BOOKS_MIN_REVIEWS: int = 3
+    TRENDING_WINDOW_HOURS: int = 24
+    BOOK_FILTER_ERROR_RATE: float = 0.01
+    BOOK_FILTER_REBUILD_SECONDS: int = 3600
+    BOOK_FILTER_CONFIRM_MISSES: bool = True
+    REVIEW_BATCH_ENABLED: bool = False
+    REVIEW_BATCH_WINDOW_MS: int = 5
+    REVIEW_BATCH_MAX_SIZE: int = 100
+    USER_PRINCIPAL_TTL: int = 300
+    USER_PRINCIPAL_LOCAL_TTL: int = 30
+    USER_PRINCIPAL_CACHE_SIZE: int = 10_000
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    PASSWORD_HASH_USE_PROCESSES: bool = False
+    TOKEN_REVOCATION_LOCAL_CACHE: bool = True
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -24,3 +56,17 @@ Config = Settings()
 broker_url = Config.REDIS_URL
 result_backend = Config.REDIS_URL
 broker_connection_retry_on_startup = True
+beat_schedule = {
+    "reconcile-book-stats": {
+        "task": "src.celery_tasks.reconcile_book_stats",
+        "schedule": 6 * 60 * 60,
+    },
+    "rebuild-book-leaderboards": {
+        "task": "src.celery_tasks.reconcile_book_leaderboards",
+        "schedule": 15 * 60,
+    },
+    "dispatch-email-outbox": {
+        "task": "src.celery_tasks.dispatch_email_outbox",
+        "schedule": 30,
+    },
+}
@@ -1,9 +1,10 @@
 from sqlmodel import text
-from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from src.config import Config
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import sessionmaker
 
 DB_URL = Config.DB_URL
 
@@ -12,10 +13,79 @@ import ssl
 
 ssl_context = ssl.create_default_context()
 
-async_engine: AsyncEngine = create_async_engine(
-    url=DB_URL,
-    connect_args={"ssl": False},
-)
+
+def engine_options(url: str) -> dict:
+    """Pool and driver settings from `Config` for ``url``.
+
+    In-memory SQLite gets none, since its pool holds a single connection.
+    ``DB_STATEMENT_CACHE_SIZE`` sizes both asyncpg's and SQLAlchemy's
+    prepared-statement caches; set it to 0 behind pgbouncer in transaction
+    mode.
+    """
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    options = {
+        "pool_size": Config.DB_POOL_SIZE,
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+        "pool_timeout": Config.DB_POOL_TIMEOUT,
+        "pool_recycle": Config.DB_POOL_RECYCLE,
+        "pool_pre_ping": Config.DB_POOL_PRE_PING,
+    }
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "ssl": False,
+            "statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
+
+async_engine: AsyncEngine = create_async_engine(url=DB_URL, **engine_options(DB_URL))
+
+async_session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+class PoolMonitor:
+    """Checkout counters for an engine's connection pool, for sizing pools per worker."""
+
+    def __init__(self, engine: AsyncEngine):
+        self.pool = engine.sync_engine.pool
+        self.checkouts = 0
+        self.connects = 0
+        self.peak_checked_out = 0
+        event.listen(self.pool, "checkout", self._on_checkout)
+        event.listen(self.pool, "connect", self._on_connect)
+
+    def _on_checkout(self, *args):
+        self.checkouts += 1
+        self.peak_checked_out = max(self.peak_checked_out, self._checked_out())
+
+    def _on_connect(self, *args):
+        self.connects += 1
+
+    def _checked_out(self) -> int:
+        checkedout = getattr(self.pool, "checkedout", None)
+        return checkedout() if checkedout else 0
+
+    def stats(self) -> dict:
+        stats = {
+            "pool": type(self.pool).__name__,
+            "checked_out": self._checked_out(),
+            "peak_checked_out": self.peak_checked_out,
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+        }
+        if hasattr(self.pool, "size"):
+            stats.update(
+                size=self.pool.size(),
+                checked_in=self.pool.checkedin(),
+                overflow=max(0, self.pool.overflow()),
+            )
+        return stats
+
+
+db_pool = PoolMonitor(async_engine)
 
 
 async def init_db():
@@ -30,8 +100,5 @@ async def init_db():
 
 
 async def get_session() -> AsyncSession:
-    Session = sessionmaker(
-        bind=async_engine, class_=AsyncSession, expire_on_commit=False
-    )
-    async with Session() as session:
+    async with async_session_factory() as session:
         yield session
@@ -1,15 +1,240 @@
+import asyncio
+import time
 import redis.asyncio as redis
+from redis.exceptions import ResponseError
 from src.config import Config
 
-JTI_EXPIRY = 3600
+redis_client = redis.from_url(Config.REDIS_URL)
 
-token_blocklist = redis.from_url(Config.REDIS_URL)
 
+class InMemoryRedis:
+    """Process-local stand-in for the subset of the redis client used by the app.
 
-async def add_jti_to_blocklist(jti: str) -> None:
-    await token_blocklist.set(name=jti, value="", ex=JTI_EXPIRY)
+    Intended for tests and local development without a Redis server.
+    """
 
+    def __init__(self):
+        self.data = {}
+        self.expires_at = {}
+        self.subscribers = {}
 
-async def check_token_in_blocklist(jti: str) -> bool:
-    jti = await token_blocklist.exists(jti)
-    return True if jti else False
+    def _expire(self, name):
+        expires_at = self.expires_at.get(name)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.data.pop(name, None)
+            self.expires_at.pop(name, None)
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode()
+
+    async def get(self, name):
+        self._expire(name)
+        return self.data.get(name)
+
+    async def set(self, name, value, ex=None):
+        self.data[name] = self._encode(value)
+        if ex is None:
+            self.expires_at.pop(name, None)
+        else:
+            self.expires_at[name] = time.monotonic() + ex
+        return True
+
+    async def delete(self, *names):
+        deleted = 0
+        for name in names:
+            self._expire(name)
+            if self.data.pop(name, None) is not None:
+                deleted += 1
+            self.expires_at.pop(name, None)
+        return deleted
+
+    async def exists(self, *names):
+        count = 0
+        for name in names:
+            self._expire(name)
+            count += name in self.data
+        return count
+
+    async def expire(self, name, seconds):
+        self._expire(name)
+        if name not in self.data:
+            return False
+        self.expires_at[name] = time.monotonic() + seconds
+        return True
+
+    async def rename(self, src, dst):
+        self._expire(src)
+        if src not in self.data:
+            raise ResponseError("no such key")
+        self.data[dst] = self.data.pop(src)
+        self.expires_at.pop(dst, None)
+        if src in self.expires_at:
+            self.expires_at[dst] = self.expires_at.pop(src)
+        return True
+
+    def _zset(self, name, create=False):
+        self._expire(name)
+        zset = self.data.get(name)
+        if zset is None and create:
+            zset = self.data[name] = {}
+        return zset if zset is not None else {}
+
+    async def zadd(self, name, mapping):
+        zset = self._zset(name, create=True)
+        added = 0
+        for member, score in mapping.items():
+            member = self._encode(member)
+            added += member not in zset
+            zset[member] = float(score)
+        return added
+
+    async def zincrby(self, name, amount, value):
+        zset = self._zset(name, create=True)
+        member = self._encode(value)
+        zset[member] = zset.get(member, 0.0) + amount
+        return zset[member]
+
+    async def zrem(self, name, *values):
+        zset = self._zset(name)
+        removed = 0
+        for value in values:
+            removed += zset.pop(self._encode(value), None) is not None
+        return removed
+
+    async def zunionstore(self, dest, keys):
+        union = {}
+        for key in keys:
+            for member, score in self._zset(key).items():
+                union[member] = union.get(member, 0.0) + score
+        await self.delete(dest)
+        if union:
+            self.data[dest] = union
+        return len(union)
+
+    @staticmethod
+    def _score_bound(bound):
+        bound = bound.decode() if isinstance(bound, bytes) else str(bound)
+        exclusive = bound.startswith("(")
+        value = float(bound.lstrip("(").replace("+inf", "inf"))
+        return value, exclusive
+
+    def _members_by_score(self, name, min, max):
+        high, high_exclusive = self._score_bound(max)
+        low, low_exclusive = self._score_bound(min)
+        return [
+            (member, score)
+            for member, score in self._zset(name).items()
+            if (score < high if high_exclusive else score <= high) and (score > low if low_exclusive else score >= low)
+        ]
+
+    async def zrangebyscore(self, name, min, max, start=None, num=None, withscores=False):
+        members = sorted(self._members_by_score(name, min, max), key=lambda item: (item[1], item[0]))
+        if start is not None:
+            members = members[start:] if num is None or num < 0 else members[start : start + num]
+        return members if withscores else [member for member, _ in members]
+
+    async def zrevrangebyscore(self, name, max, min, start=None, num=None, withscores=False):
+        members = self._members_by_score(name, min, max)
+        members.sort(key=lambda item: (item[1], item[0]), reverse=True)
+        if start is not None:
+            members = members[start:] if num is None or num < 0 else members[start : start + num]
+        return members if withscores else [member for member, _ in members]
+
+    async def zremrangebyscore(self, name, min, max):
+        zset = self._zset(name)
+        members = self._members_by_score(name, min, max)
+        for member, _ in members:
+            del zset[member]
+        return len(members)
+
+    async def zscore(self, name, value):
+        return self._zset(name).get(self._encode(value))
+
+    async def publish(self, channel, message):
+        queues = self.subscribers.get(channel, [])
+        for queue in queues:
+            queue.put_nowait({"type": "message", "channel": self._encode(channel), "data": self._encode(message)})
+        return len(queues)
+
+    def pubsub(self):
+        return InMemoryPubSub(self)
+
+    def pipeline(self, transaction=True):
+        return InMemoryPipeline(self)
+
+
+class InMemoryPubSub:
+    """Subscription to `InMemoryRedis.publish`, shaped like redis' `PubSub`."""
+
+    def __init__(self, client: InMemoryRedis):
+        self.client = client
+        self.queue = asyncio.Queue()
+        self.channels = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def subscribe(self, *channels):
+        for channel in channels:
+            self.client.subscribers.setdefault(channel, []).append(self.queue)
+            self.channels.append(channel)
+            self.queue.put_nowait(
+                {"type": "subscribe", "channel": self.client._encode(channel), "data": len(self.channels)}
+            )
+
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        while True:
+            if self.queue.empty():
+                try:
+                    message = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    return None
+            else:
+                message = self.queue.get_nowait()
+            if not (ignore_subscribe_messages and message["type"] == "subscribe"):
+                return message
+
+    async def ping(self, message=None):
+        self.queue.put_nowait({"type": "pong", "channel": None, "data": self.client._encode(message or b"")})
+
+    async def aclose(self):
+        for channel in self.channels:
+            self.client.subscribers[channel].remove(self.queue)
+        self.channels = []
+
+
+class InMemoryPipeline:
+    """Queues commands against an `InMemoryRedis` and runs them on `execute`."""
+
+    def __init__(self, client: InMemoryRedis):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.commands.clear()
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self):
+        commands, self.commands = self.commands, []
+        return [await method(*args, **kwargs) for method, args, kwargs in commands]
@@ -91,6 +91,18 @@ class AccountNotVerified(BaseException):
     pass
 
 
+class InvalidCursor(BaseException):
+    """Pagination cursor is malformed or was not issued by this API"""
+
+    pass
+
+
+class PasswordHashingBusy(BaseException):
+    """Too many password hashes are already waiting for a worker"""
+
+    pass
+
+
 def create_exception_handler(
     status_code: int, initial_detail: Any
 ) -> Callable[[Request, Exception], JSONResponse]:
@@ -167,3 +179,36 @@ def register_all_errors(app: FastAPI):
             },
         ),
     )
+
+    app.add_exception_handler(
+        BookNotFound,
+        create_exception_handler(
+            status_code=status.HTTP_404_NOT_FOUND,
+            initial_detail={
+                "message": "Book with id not found",
+                "error_code": "book_not_found",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        InvalidCursor,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Invalid pagination cursor",
+                "error_code": "invalid_cursor",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        PasswordHashingBusy,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail={
+                "message": "Too many sign-in attempts in progress, please try again shortly",
+                "error_code": "password_hashing_busy",
+            },
+        ),
+    )
@@ -1,4 +1,12 @@
+import asyncio
+import time
+from email.message import EmailMessage
+from email.utils import formataddr, formatdate, make_msgid
+from typing import List, Optional
+
+import aiosmtplib
 from fastapi_mail import ConnectionConfig, FastMail, MessageSchema, MessageType
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
 from .config import Config
 from pathlib import Path
 
@@ -26,3 +34,204 @@ def create_message(recipients: list[str], subject: str, body: str):
 
 
 mail = FastMail(config=mail_conf)
+
+
+def build_email(message: MessageSchema, sender: str) -> EmailMessage:
+    """The MIME message for ``message``, built from its public fields only."""
+    if message.attachments or message.template_body is not None:
+        raise ValueError("Only rendered bodies without attachments can be built")
+    email = EmailMessage()
+    email["Date"] = formatdate(localtime=True)
+    email["Message-ID"] = make_msgid()
+    email["From"] = sender
+    email["To"] = ", ".join(map(str, message.recipients))
+    email["Subject"] = message.subject
+    for header, addresses in (("Cc", message.cc), ("Bcc", message.bcc), ("Reply-To", message.reply_to)):
+        if addresses:
+            email[header] = ", ".join(map(str, addresses))
+    for name, value in (message.headers or {}).items():
+        email[name] = value
+    email.set_content(message.body or "", subtype=message.subtype.value, charset=message.charset)
+    if message.alternative_body is not None:
+        alternative = "plain" if message.subtype == MessageType.html else "html"
+        email.add_alternative(message.alternative_body, subtype=alternative, charset=message.charset)
+    return email
+
+
+class EmailTemplates:
+    """Jinja environment for email bodies, compiled once per process.
+
+    Templates are never re-checked on disk once loaded, and their compiled
+    bytecode is cached in ``cache_dir`` (a per-user temp directory by
+    default), so a new worker process loads them without re-parsing.
+    """
+
+    def __init__(self, folder: Path, cache_dir: Optional[str] = None):
+        self.env = Environment(
+            loader=FileSystemLoader(folder),
+            autoescape=select_autoescape(["html"]),
+            bytecode_cache=FileSystemBytecodeCache(cache_dir) if cache_dir else FileSystemBytecodeCache(),
+            auto_reload=False,
+            cache_size=-1,
+        )
+
+    def warm(self) -> int:
+        """Compile every email template now rather than on the first email."""
+        names = self.env.list_templates(filter_func=lambda name: name.startswith("email/"))
+        for name in names:
+            self.env.get_template(name)
+        return len(names)
+
+    def render(self, name: str, context: dict) -> str:
+        return self.env.get_template(name).render(context)
+
+    def render_many(self, name: str, contexts: List[dict]) -> List[str]:
+        """Render ``name`` once per recipient context, looking the template up only once."""
+        template = self.env.get_template(name)
+        return [template.render(context) for context in contexts]
+
+
+email_templates = EmailTemplates(Path(BASE_DIR, "templates"), Config.MAIL_TEMPLATE_CACHE_DIR)
+
+
+class PooledConnection:
+    def __init__(self, smtp: aiosmtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    """SMTP sessions kept open between messages, for the Celery email worker.
+
+    `FastMail.send_message` connects, logs in and quits for every message.
+    Here at most ``size`` sessions are open at once and each is reused until
+    it has been idle for ``max_idle_seconds`` or has carried ``max_messages``
+    messages, since servers drop idle clients and cap messages per session.
+    A message whose session turns out to have been dropped is retried once on
+    a fresh one. Must only be used from one event loop.
+    """
+
+    def __init__(self, config: ConnectionConfig, size: int, max_idle_seconds: int, max_messages: int):
+        self.config = config
+        self.size = size
+        self.max_idle_seconds = max_idle_seconds
+        self.max_messages = max_messages
+        self.connects = 0
+        self.reconnects = 0
+        self.sent = 0
+        self.failed = 0
+        self._idle: List[PooledConnection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def send(self, messages: List[MessageSchema]) -> dict:
+        """Send ``messages`` over one session.
+
+        A message the server refuses is reported in ``failed`` and the rest
+        are still sent; connection errors propagate.
+        """
+        sender = self.config.MAIL_FROM
+        if self.config.MAIL_FROM_NAME is not None:
+            sender = formataddr((self.config.MAIL_FROM_NAME, sender))
+        emails = [build_email(message, sender) for message in messages]
+        if self.config.SUPPRESS_SEND:
+            return {"sent": len(emails), "failed": []}
+
+        sent, failed = 0, []
+        connection = await self._acquire()
+        try:
+            for index, (message, email) in enumerate(zip(messages, emails)):
+                if connection.sent >= self.max_messages:
+                    await self._close(connection)
+                    connection = await self._open()
+                try:
+                    try:
+                        await self._send_one(connection, email)
+                    except aiosmtplib.SMTPServerDisconnected:
+                        self.reconnects += 1
+                        await self._close(connection)
+                        connection = await self._open()
+                        await self._send_one(connection, email)
+                except (aiosmtplib.SMTPRecipientsRefused, aiosmtplib.SMTPResponseException) as e:
+                    failed.append({"index": index, "recipients": message.recipients, "error": str(e)})
+                else:
+                    sent += 1
+        finally:
+            await self._release(connection)
+        self.sent += sent
+        self.failed += len(failed)
+        return {"sent": sent, "failed": failed}
+
+    async def _send_one(self, connection: PooledConnection, email):
+        await connection.smtp.send_message(email)
+        connection.sent += 1
+        connection.last_used = time.monotonic()
+
+    async def _acquire(self) -> PooledConnection:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                connection = self._idle.pop()
+                idle_for = time.monotonic() - connection.last_used
+                if connection.smtp.is_connected and idle_for < self.max_idle_seconds:
+                    return connection
+                await self._close(connection)
+            return await self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def _release(self, connection: PooledConnection):
+        if connection.smtp.is_connected and connection.sent < self.max_messages:
+            self._idle.append(connection)
+        else:
+            await self._close(connection)
+        self._slots.release()
+
+    async def _open(self) -> PooledConnection:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.config.MAIL_SERVER,
+            port=self.config.MAIL_PORT,
+            timeout=self.config.TIMEOUT,
+            use_tls=self.config.MAIL_SSL_TLS,
+            start_tls=self.config.MAIL_STARTTLS,
+            validate_certs=self.config.VALIDATE_CERTS,
+            local_hostname=self.config.LOCAL_HOSTNAME,
+        )
+        await smtp.connect()
+        if self.config.USE_CREDENTIALS:
+            await smtp.login(self.config.MAIL_USERNAME, self.config.MAIL_PASSWORD.get_secret_value())
+        self.connects += 1
+        return PooledConnection(smtp)
+
+    async def _close(self, connection: PooledConnection):
+        if not connection.smtp.is_connected:
+            return
+        try:
+            await connection.smtp.quit()
+        except aiosmtplib.SMTPException:
+            connection.smtp.close()
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await self._close(connection)
+
+    def stats(self) -> dict:
+        return {
+            "open": len(self._idle),
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+
+
+smtp_pool = SMTPPool(
+    mail_conf,
+    size=Config.MAIL_POOL_SIZE,
+    max_idle_seconds=Config.MAIL_POOL_MAX_IDLE_SECONDS,
+    max_messages=Config.MAIL_POOL_MAX_MESSAGES,
+)
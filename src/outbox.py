@@ -0,0 +1,167 @@
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy import JSON, Index, Integer, String, Text, text
+from sqlmodel import Column, Field, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.mail import SMTPPool, create_message, email_templates
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxEmail(SQLModel, table=True):
+    """An email waiting to be sent, written in the transaction that caused it."""
+
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index(
+            "ix_email_outbox_pending",
+            "next_attempt_at",
+            postgresql_where=text("sent_at IS NULL AND failed_at IS NULL"),
+            sqlite_where=text("sent_at IS NULL AND failed_at IS NULL"),
+        ),
+    )
+
+    id: uuid.UUID = Field(
+        sa_column=Column(pg.UUID(as_uuid=True), nullable=False, primary_key=True, default=uuid.uuid4)
+    )
+    recipients: List[str] = Field(sa_column=Column(JSON().with_variant(pg.JSONB(), "postgresql"), nullable=False))
+    subject: str = Field(sa_column=Column(String, nullable=False))
+    body: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
+    template: Optional[str] = Field(default=None, sa_column=Column(String, nullable=True))
+    context: Optional[dict] = Field(
+        default=None, sa_column=Column(JSON().with_variant(pg.JSONB(), "postgresql"), nullable=True)
+    )
+    attempts: int = Field(sa_column=Column(Integer, nullable=False, server_default="0", default=0))
+    last_error: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
+    next_attempt_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now))
+    sent_at: Optional[datetime] = Field(default=None, sa_column=Column(pg.TIMESTAMP, nullable=True))
+    failed_at: Optional[datetime] = Field(default=None, sa_column=Column(pg.TIMESTAMP, nullable=True))
+    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now))
+
+
+class EmailOutbox:
+    """Queue emails in the database and deliver them from the Celery worker.
+
+    `enqueue` only adds a row to the caller's session, so the email is
+    committed (or rolled back) together with the change that caused it and
+    the request never waits on SMTP. An email is either a ready ``body`` or
+    a ``template`` and its ``context``, rendered by the worker. `dispatch`
+    renders and sends due emails in batches over one SMTP session. A failed
+    email is retried after ``base_delay`` seconds, doubling per attempt up
+    to ``max_delay``, and is marked failed after ``max_attempts``. Delivery
+    is at least once: a worker that dies after sending but before committing
+    sends that batch again.
+    """
+
+    def __init__(self, batch_size: int, max_attempts: int, base_delay: int, max_delay: int):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def enqueue(
+        self,
+        session: AsyncSession,
+        recipients: List[str],
+        subject: str,
+        body: Optional[str] = None,
+        template: Optional[str] = None,
+        context: Optional[dict] = None,
+    ) -> OutboxEmail:
+        email = OutboxEmail(
+            recipients=list(recipients), subject=subject, body=body, template=template, context=context
+        )
+        session.add(email)
+        return email
+
+    def render(self, emails: List[OutboxEmail]):
+        """Bodies for ``emails``, rendering each template once for all its emails, and render errors by index."""
+        bodies = [email.body for email in emails]
+        errors = {}
+        by_template = defaultdict(list)
+        for index, email in enumerate(emails):
+            if email.template is not None:
+                by_template[email.template].append(index)
+        for name, indexes in by_template.items():
+            try:
+                rendered = email_templates.render_many(name, [emails[index].context or {} for index in indexes])
+            except Exception as e:
+                logger.exception("Email template %s failed to render", name)
+                errors.update((index, f"template {name}: {e}") for index in indexes)
+                continue
+            for index, body in zip(indexes, rendered):
+                bodies[index] = body
+        return bodies, errors
+
+    def backoff(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(self.max_delay, self.base_delay * 2 ** (attempts - 1)))
+
+    async def dispatch(self, session: AsyncSession, pool: SMTPPool) -> dict:
+        """Send every due email, one batch per transaction."""
+        totals = {"sent": 0, "retrying": 0, "failed": 0}
+        while True:
+            counts = await self.dispatch_batch(session, pool)
+            for key in totals:
+                totals[key] += counts[key]
+            if sum(counts.values()) < self.batch_size:
+                return totals
+
+    async def dispatch_batch(self, session: AsyncSession, pool: SMTPPool) -> dict:
+        now = datetime.now()
+        # SKIP LOCKED lets several workers drain the outbox without sending an email twice.
+        statement = (
+            select(OutboxEmail)
+            .where(OutboxEmail.sent_at.is_(None), OutboxEmail.failed_at.is_(None), OutboxEmail.next_attempt_at <= now)
+            .order_by(OutboxEmail.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        emails = (await session.exec(statement)).all()
+        if not emails:
+            await session.commit()
+            return {"sent": 0, "retrying": 0, "failed": 0}
+
+        bodies, errors = self.render(emails)
+        ready = [index for index in range(len(emails)) if index not in errors]
+        messages = [
+            create_message(recipients=emails[index].recipients, subject=emails[index].subject, body=bodies[index])
+            for index in ready
+        ]
+        try:
+            result = await pool.send(messages) if messages else {"failed": []}
+            errors.update((ready[failure["index"]], failure["error"]) for failure in result["failed"])
+        except Exception as e:
+            logger.warning("Outbox batch of %d could not be sent", len(messages), exc_info=True)
+            errors.update((index, str(e)) for index in ready)
+
+        now = datetime.now()
+        failed = 0
+        for index, email in enumerate(emails):
+            error = errors.get(index)
+            if error is None:
+                email.sent_at = now
+                continue
+            email.attempts += 1
+            email.last_error = error
+            if email.attempts >= self.max_attempts:
+                email.failed_at = now
+                failed += 1
+            else:
+                email.next_attempt_at = now + self.backoff(email.attempts)
+        await session.commit()
+        return {"sent": len(emails) - len(errors), "retrying": len(errors) - failed, "failed": failed}
+
+
+email_outbox = EmailOutbox(
+    batch_size=Config.OUTBOX_BATCH_SIZE,
+    max_attempts=Config.OUTBOX_MAX_ATTEMPTS,
+    base_delay=Config.OUTBOX_RETRY_BASE_SECONDS,
+    max_delay=Config.OUTBOX_RETRY_MAX_SECONDS,
+)
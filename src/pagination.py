@@ -0,0 +1,96 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Generic, List, Optional, Sequence, TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel
+from sqlalchemy import tuple_
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.errors import InvalidCursor
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(payload: dict) -> str:
+    raw = json.dumps(payload, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor()
+    if not isinstance(payload, dict):
+        raise InvalidCursor()
+    return payload
+
+
+def _to_python(value: Any, column) -> Any:
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is UUID:
+        return UUID(value)
+    return python_type(value)
+
+
+def _keyset_values(cursor: str, keyset: Sequence) -> tuple:
+    payload = decode_cursor(cursor)
+    try:
+        return tuple(_to_python(payload[column.key], column) for column in keyset)
+    except (KeyError, ValueError, TypeError):
+        raise InvalidCursor()
+
+
+async def keyset_paginate(
+    session: AsyncSession,
+    statement,
+    keyset: Sequence,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Page:
+    """Run ``statement`` one page at a time, newest first.
+
+    ``keyset`` is the list of columns the rows are ordered by (descending). The
+    last column must be unique so every row has a distinct position, e.g.
+    ``(Book.created_at, Book.id)``.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor is not None:
+        statement = statement.where(tuple_(*keyset) < _keyset_values(cursor, keyset))
+    statement = statement.order_by(*(column.desc() for column in keyset)).limit(limit + 1)
+
+    result = await session.exec(statement)
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor({column.key: getattr(last, column.key) for column in keyset})
+    return Page(items=rows, next_cursor=next_cursor)
+
+
+def cursor_offset(cursor: Optional[str]) -> int:
+    if cursor is None:
+        return 0
+    offset = decode_cursor(cursor).get("offset")
+    if not isinstance(offset, int) or offset < 0:
+        raise InvalidCursor()
+    return offset
+
+
+def next_offset_cursor(offset: int, limit: int, has_more: bool) -> Optional[str]:
+    return encode_cursor({"offset": offset + limit}) if has_more else None
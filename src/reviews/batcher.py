@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import insert
+
+from src.books.cache import book_cache
+from src.books.leaderboards import book_leaderboards
+from src.books.models import Review
+from src.books.stats import BookStatsService
+from src.config import Config
+from src.db.main import async_session_factory
+
+from .schemas import ReviewCreateRequest
+
+logger = logging.getLogger(__name__)
+
+book_stats_service = BookStatsService()
+
+PendingReview = Tuple[dict, asyncio.Future]
+
+
+class ReviewWriteBatcher:
+    """Coalesce review inserts that arrive within ``window_ms`` into one transaction.
+
+    The first review of a batch starts the window; the batch is flushed when
+    the window closes or ``max_size`` reviews are waiting, whichever comes
+    first. A flush is one multi-row INSERT into ``reviews``, one multi-row
+    upsert into ``book_stats`` and one COMMIT. If the batch fails (e.g. one
+    review points at a deleted book) every review is retried on its own, so
+    each caller gets its own row or its own error.
+    """
+
+    def __init__(self, window_ms: int, max_size: int, enabled: bool = True, session_factory=async_session_factory):
+        self.window = window_ms / 1000
+        self.max_size = max_size
+        self.enabled = enabled
+        self.session_factory = session_factory
+        self.batches = 0
+        self.reviews = 0
+        self.fallbacks = 0
+        self._pending: List[PendingReview] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+    async def add(self, user_id: uuid.UUID, book_id: uuid.UUID, review_data: ReviewCreateRequest) -> Review:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        values = {**review_data.model_dump(), "user_id": user_id, "book_id": book_id}
+        self._pending.append((values, future))
+        if len(self._pending) >= self.max_size:
+            self._flush_pending()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush_pending)
+        return await future
+
+    async def drain(self):
+        """Flush whatever is waiting and wait for every flush in progress."""
+        self._flush_pending()
+        while self._flushes:
+            await asyncio.gather(*self._flushes)
+
+    def _flush_pending(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[PendingReview]):
+        self.batches += 1
+        self.reviews += len(batch)
+        try:
+            written = await self._write(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                _settle(batch[0][1], exception=e)
+                return
+            logger.warning("Review batch of %d failed, retrying one by one", len(batch), exc_info=True)
+        else:
+            await self._publish(batch, *written)
+            return
+
+        self.fallbacks += 1
+        for pending in batch:
+            try:
+                written = await self._write([pending])
+            except Exception as e:
+                _settle(pending[1], exception=e)
+            else:
+                await self._publish([pending], *written)
+
+    async def _write(self, batch: List[PendingReview]):
+        now = datetime.now()
+        rows = [{**values, "id": uuid.uuid4(), "created_at": now, "update_at": now} for values, _ in batch]
+        async with self.session_factory() as session:
+            await session.exec(insert(Review.__table__).values(rows))
+            totals = await book_stats_service.apply_reviews(
+                ((row["book_id"], row["rating"]) for row in rows), session
+            )
+            await session.commit()
+        return rows, totals, now
+
+    async def _publish(self, batch: List[PendingReview], rows: List[dict], totals: dict, now: datetime):
+        for row, (_, future) in zip(rows, batch):
+            _settle(future, result=Review(**row))
+        added = Counter(row["book_id"] for row in rows)
+        for book_id, (review_count, rating_sum) in totals.items():
+            await book_cache.invalidate(book_id)
+            await book_leaderboards.record_review(book_id, review_count, rating_sum, now, delta=added[book_id])
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "batches": self.batches,
+            "reviews": self.reviews,
+            "fallbacks": self.fallbacks,
+            "average_batch_size": self.reviews / self.batches if self.batches else 0.0,
+        }
+
+
+def _settle(future: asyncio.Future, result=None, exception: Optional[BaseException] = None):
+    # The caller may have been cancelled while the batch was in flight.
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+
+review_write_batcher = ReviewWriteBatcher(
+    window_ms=Config.REVIEW_BATCH_WINDOW_MS,
+    max_size=Config.REVIEW_BATCH_MAX_SIZE,
+    enabled=Config.REVIEW_BATCH_ENABLED,
+)
@@ -1,22 +1,18 @@
 from uuid import UUID
-from fastapi import APIRouter, Depends
-from typing import List
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
 
 from fastapi import status, HTTPException
 from sqlmodel.ext.asyncio.session import AsyncSession
-from src.books.schemas import (
-    BookCreateRequest,
-    BookCreateResponse,
-    BookEditRequest,
-    Book,
-)
-
-
+from src.books.bloom import book_id_filter
+from src.books.loaders import BOOK_LIST_LOADER
 from src.books.services import BookService
 from src.db.main import get_session
+from src.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from src.auth.dependencies import AccessTokenBearer, RoleChecker
+from src.errors import BookNotFound
 from src.reviews.services import ReviewService
-from .schemas import Review, ReviewCreateRequest
+from .schemas import Review, ReviewCreateRequest, ReviewPage, ReviewSort
 
 reviews_router = APIRouter()
 book_service = BookService()
@@ -26,7 +22,7 @@ role_checker = Depends(RoleChecker(["user"]))
 
 
 async def get_book_by_id(book_id: UUID, session):
-    book = await book_service.get_book_by_id(book_id, session)
+    book = await book_service.get_book_by_id(book_id, session, loader=BOOK_LIST_LOADER)
     return book
 
 
@@ -42,13 +38,10 @@ async def add_book(
     session: AsyncSession = Depends(get_session),
     token_info=Depends(access_token_bearer),
 ):
-    user_id = token_info.get("user")["user_id"]
-    book = book_service.get_book_by_id(book_id, session)
-    if book is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail={"message": "Book with id not found"},
-        )
+    user_id = UUID(token_info.get("user")["user_id"])
+    # Answered from memory for known books; the reviews.book_id foreign key is the final guard.
+    if not await book_id_filter.might_exist(book_id, session):
+        raise BookNotFound()
     new_book = await review_service.add_review_to_book(
         user_id, book_id, book_data, session
     )
@@ -56,64 +49,42 @@ async def add_book(
 
 
 @reviews_router.get(
-    "/",
-    response_model=List[Book],
-    status_code=status.HTTP_200_OK,
-    dependencies=[role_checker],
-)
-async def get_all_books(
-    session: AsyncSession = Depends(get_session),
-    token_info=Depends(access_token_bearer),
-):
-    return await book_service.get_all_books(session)
-
-
-@reviews_router.get(
-    "/users/{user_id}",
-    response_model=List[Book],
-    status_code=status.HTTP_200_OK,
-    dependencies=[role_checker],
-)
-async def get_user_books(
-    user_id: UUID,
-    session: AsyncSession = Depends(get_session),
-    token_info=Depends(access_token_bearer),
-):
-    return await book_service.get_all_books_by_user(user_id, session)
-
-
-@reviews_router.get(
-    "/{book_id}",
-    response_model=Book,
+    "/book/{book_id}",
+    response_model=ReviewPage,
     status_code=status.HTTP_200_OK,
     dependencies=[role_checker],
 )
-async def get_book(
+async def get_book_reviews(
     book_id: UUID,
+    sort: ReviewSort = ReviewSort.newest,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     session: AsyncSession = Depends(get_session),
     token_info=Depends(access_token_bearer),
 ):
-    book = await get_book_by_id(book_id, session)
-    if not book:
+    page = await review_service.get_book_reviews(book_id, session, sort, limit, cursor)
+    # Only an empty first page needs to tell "no reviews" apart from "no book".
+    if not page.items and cursor is None and await get_book_by_id(book_id, session) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="No book with matching id"
         )
-    return book
+    return page
 
 
 @reviews_router.delete(
-    "/{book_id}",
+    "/{review_id}",
     status_code=status.HTTP_204_NO_CONTENT,
     dependencies=[role_checker],
 )
-async def delete_book(
-    book_id: UUID,
+async def delete_review(
+    review_id: UUID,
     session: AsyncSession = Depends(get_session),
-    user=Depends(access_token_bearer),
+    token_info=Depends(access_token_bearer),
 ):
-    book = await book_service.delete_book_by_id(book_id, session)
-    if book is None:
+    user_id = UUID(token_info.get("user")["user_id"])
+    deleted = await review_service.delete_review(review_id, user_id, session)
+    if deleted is None:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="No book with matching id"
+            status_code=status.HTTP_404_NOT_FOUND, detail="No review with matching id"
         )
     return {}
@@ -1,12 +1,15 @@
 from datetime import datetime
+from enum import Enum
 from typing import Optional
 from uuid import UUID
 from pydantic import BaseModel, Field
 
+from src.pagination import Page
+
 
 class ReviewCreateRequest(BaseModel):
     review_text: str
-    rating: int = Field(lt=5)
+    rating: int = Field(ge=1, le=5)
 
 
 class Review(ReviewCreateRequest):
@@ -17,3 +20,11 @@ class Review(ReviewCreateRequest):
     # description: str
     created_at: datetime
     update_at: datetime
+
+
+class ReviewPage(Page[Review]): ...
+
+
+class ReviewSort(str, Enum):
+    newest = "newest"
+    rating = "rating"
@@ -1,8 +1,31 @@
+from typing import Optional
 from uuid import UUID
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select, desc
+from src.books.cache import book_cache
+from src.books.leaderboards import book_leaderboards
 from src.books.models import Review
-from .schemas import ReviewCreateRequest
+from src.books.stats import BookStatsService
+from src.errors import BookNotFound
+from src.pagination import DEFAULT_PAGE_SIZE, keyset_paginate
+from .batcher import review_write_batcher
+from .schemas import ReviewCreateRequest, ReviewSort
+
+book_stats_service = BookStatsService()
+
+# Both orders are served by an index leading with book_id, see `Review.__table_args__`.
+REVIEW_KEYSETS = {
+    ReviewSort.newest: (Review.created_at, Review.id),
+    ReviewSort.rating: (Review.rating, Review.created_at, Review.id),
+}
+
+
+def raise_for_missing_book(error: IntegrityError):
+    # Postgres names the violated constraint; the book may have been deleted after the existence check.
+    if "reviews_book_id_fkey" in str(error.orig) or "book_stats_book_id_fkey" in str(error.orig):
+        raise BookNotFound() from error
 
 
 class ReviewService:
@@ -25,6 +48,17 @@ class ReviewService:
     #         return None
     #     return result.first()
 
+    async def get_book_reviews(
+        self,
+        book_id: UUID,
+        session: AsyncSession,
+        sort: ReviewSort = ReviewSort.newest,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
+        statement = select(Review).where(Review.book_id == book_id)
+        return await keyset_paginate(session, statement, REVIEW_KEYSETS[sort], limit, cursor)
+
     async def add_review_to_book(
         self,
         user_id: UUID,
@@ -32,14 +66,56 @@ class ReviewService:
         review_data: ReviewCreateRequest,
         session: AsyncSession,
     ):
+        if review_write_batcher.enabled:
+            try:
+                return await review_write_batcher.add(user_id, book_id, review_data)
+            except IntegrityError as e:
+                raise_for_missing_book(e)
+                raise
+
         review_dict = review_data.model_dump()
         new_review = Review(**review_dict)
         new_review.user_id = user_id
         new_review.book_id = book_id
         session.add(new_review)
-        await session.commit()
+        try:
+            review_count, rating_sum = await book_stats_service.apply_review(book_id, new_review.rating, session)
+            await session.commit()
+        except IntegrityError as e:
+            await session.rollback()
+            raise_for_missing_book(e)
+            raise
+        await book_cache.invalidate(book_id)
+        await book_leaderboards.record_review(book_id, review_count, rating_sum, new_review.created_at)
         return new_review
 
+    async def delete_review(self, review_id: UUID, user_id: UUID, session: AsyncSession):
+        statement = (
+            delete(Review)
+            .where(Review.id == review_id, Review.user_id == user_id)
+            .returning(Review.book_id, Review.rating, Review.created_at)
+            .execution_options(synchronize_session="fetch")
+        )
+        result = await session.exec(statement)
+        deleted = result.first()
+        if deleted is None:
+            await session.rollback()
+            return None
+
+        if deleted.book_id is None:
+            await session.commit()
+            return {}
+
+        review_count, rating_sum = await book_stats_service.apply_review(
+            deleted.book_id, deleted.rating, session, delta=-1
+        )
+        await session.commit()
+        await book_cache.invalidate(deleted.book_id)
+        await book_leaderboards.record_review(
+            deleted.book_id, review_count, rating_sum, deleted.created_at, delta=-1
+        )
+        return {}
+
     # async def update_book(
     #     self, book_id: UUID, book_data: BookEditRequest, session: AsyncSession
     # ):
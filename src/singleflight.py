@@ -0,0 +1,48 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key starts the work in its own task; callers that
+    arrive while it is running await the same result. Once it settles the
+    key is released, so results are never cached beyond the call itself.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.calls = 0
+        self.executions = 0
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable], *args) -> Any:
+        self.calls += 1
+        if not self.enabled:
+            self.executions += 1
+            return await fn(*args)
+
+        future = self._in_flight.get(key)
+        if future is None:
+            self.executions += 1
+            # A separate task so one caller being cancelled does not cancel the others.
+            future = asyncio.ensure_future(fn(*args))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._release(key, done))
+        return await asyncio.shield(future)
+
+    def _release(self, key: Hashable, future: asyncio.Future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.cancelled():
+            # Mark the exception as retrieved even when every caller went away.
+            future.exception()
+
+    def stats(self) -> dict:
+        shared = self.calls - self.executions
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "in_flight": len(self._in_flight),
+            "coalescing_ratio": shared / self.calls if self.calls else 0.0,
+        }
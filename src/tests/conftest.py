@@ -1,9 +1,27 @@
+import time
+import uuid
+from collections import OrderedDict
 from unittest.mock import Mock
 from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
 import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from src import app
 from src.db.main import get_session
 from src.auth.dependencies import AccessTokenBearer, RoleChecker, RefreshTokenBearer
+from src.auth.principals import user_principals
+from src.auth.revocations import TokenRevocations
+from src.auth import revocations
+from src.books import routes as book_routes
+from src.books.bloom import MIN_CAPACITY, BloomFilter, book_id_filter
+from src.books.cache import book_cache
+from src.books.leaderboards import book_leaderboards
+from src.db.redis import InMemoryRedis
+from src.reviews import routes as review_routes
 
 
 mock_session = Mock()
@@ -39,3 +57,112 @@ def fake_book_service():
 @pytest.fixture
 def test_client():
     return TestClient(app)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db_engine():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def db_session(db_engine):
+    async with AsyncSession(db_engine, expire_on_commit=False) as session:
+        yield session
+
+
+@pytest.fixture
+def token_info():
+    return {
+        "user": {"email": "dayton@gmail.com", "user_id": str(uuid.uuid4()), "role": "user"},
+        "jti": str(uuid.uuid4()),
+        "refresh": False,
+    }
+
+
+@pytest.fixture
+async def api_client(db_session, token_info):
+    async def get_db_session():
+        yield db_session
+
+    overrides = {
+        get_session: get_db_session,
+        book_routes.access_token_bearer: lambda: token_info,
+        book_routes.role_checker.dependency: lambda: True,
+        review_routes.access_token_bearer: lambda: token_info,
+        review_routes.role_checker.dependency: lambda: True,
+    }
+    previous = dict(app.dependency_overrides)
+    app.dependency_overrides.update(overrides)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://localhost") as client:
+        yield client
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(previous)
+
+
+@pytest.fixture
+def sql_statements(db_engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(db_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture(autouse=True)
+def in_memory_book_cache(monkeypatch):
+    monkeypatch.setattr(book_cache, "client", InMemoryRedis())
+    monkeypatch.setattr(book_cache, "hits", 0)
+    monkeypatch.setattr(book_cache, "misses", 0)
+    return book_cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_book_id_filter(monkeypatch):
+    # Every test starts from an empty database, so the filter starts empty and up to date.
+    monkeypatch.setattr(book_id_filter, "_filter", BloomFilter(MIN_CAPACITY, book_id_filter.error_rate))
+    monkeypatch.setattr(book_id_filter, "_built_at", time.monotonic())
+    monkeypatch.setattr(book_id_filter, "_rebuild", None)
+    for counter in ("checks", "rejections", "confirmations"):
+        monkeypatch.setattr(book_id_filter, counter, 0)
+    return book_id_filter
+
+
+@pytest.fixture(autouse=True)
+def in_memory_leaderboards(monkeypatch):
+    monkeypatch.setattr(book_leaderboards, "client", InMemoryRedis())
+    return book_leaderboards
+
+
+@pytest.fixture(autouse=True)
+def in_memory_principals(monkeypatch):
+    monkeypatch.setattr(user_principals, "client", InMemoryRedis())
+    monkeypatch.setattr(user_principals, "_local", OrderedDict())
+    for counter in ("local_hits", "redis_hits", "loads"):
+        monkeypatch.setattr(user_principals, counter, 0)
+    return user_principals
+
+
+@pytest.fixture(autouse=True)
+def in_memory_token_revocations(monkeypatch):
+    token_revocations = TokenRevocations(InMemoryRedis())
+    monkeypatch.setattr(revocations, "token_revocations", token_revocations)
+    return token_revocations
+
+
+@pytest.fixture
+def admin_client(api_client):
+    app.dependency_overrides[book_routes.admin_role_checker.dependency] = lambda: True
+    return api_client
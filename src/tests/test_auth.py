@@ -1,4 +1,24 @@
+import asyncio
+import time
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src import app
+from src.auth import dependencies
+from src.auth import revocations
+from src.auth import routers as auth_routers
+from src.auth import services as user_services
+from src.auth.hashing import PasswordHasher
+from src.auth.models import User
+from src.auth.revocations import REVOKED_KEY, TokenRevocations
+from src.auth.services import UserService
 from src.auth.schemas import UserSignupRequest
+from src.auth.utils import create_access_token, decode_token
+from src.books.models import Book
+from src.db.main import get_session
+from src.db.redis import InMemoryPubSub
+from src.errors import PasswordHashingBusy
 
 auth_prefix = "/api/v1/auth"
 def test_signup(fake_session, fake_user_service, test_client):
@@ -20,3 +40,196 @@ def test_signup(fake_session, fake_user_service, test_client):
     assert fake_user_service.create_user_called_once_with(user_data, fake_session)
 
     # assert response.status_code == 201
+
+
+@pytest.mark.anyio
+async def test_token_is_decoded_and_checked_once_per_request(db_session, monkeypatch):
+    user = User(
+        username="dayton", first_name="a", last_name="b", email="dayton@gmail.com",
+        role="user", password="x", is_verified=True,
+    )
+    db_session.add(user)
+    await db_session.commit()
+    token = create_access_token({"email": user.email, "user_id": str(user.id), "role": user.role})
+
+    calls = {"decode": 0, "blocklist": 0}
+
+    def counting_decode(token):
+        calls["decode"] += 1
+        return decode_token(token)
+
+    async def counting_blocklist(jti):
+        calls["blocklist"] += 1
+        return False
+
+    monkeypatch.setattr(dependencies, "decode_token", counting_decode)
+    monkeypatch.setattr(dependencies, "check_token_in_blocklist", counting_blocklist)
+
+    async def get_db_session():
+        yield db_session
+
+    previous = app.dependency_overrides[get_session]
+    app.dependency_overrides[get_session] = get_db_session
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://localhost") as client:
+            response = await client.get("/api/v1/books/", headers={"Authorization": f"Bearer {token}"})
+    finally:
+        app.dependency_overrides[get_session] = previous
+
+    assert response.status_code == 200
+    assert calls == {"decode": 1, "blocklist": 1}
+
+
+@pytest.mark.anyio
+async def test_role_check_loads_a_cached_principal_not_the_user(
+    db_session, sql_statements, in_memory_principals, monkeypatch
+):
+    monkeypatch.setattr(dependencies, "check_token_in_blocklist", lambda jti: asyncio.sleep(0, False))
+    user = User(
+        username="dayton", first_name="a", last_name="b", email="dayton@gmail.com",
+        role="user", password="x", is_verified=False,
+    )
+    db_session.add(user)
+    db_session.add_all(Book(title=f"book {i}", author="a", description="", user_id=user.id) for i in range(20))
+    await db_session.commit()
+    token = create_access_token({"email": user.email, "user_id": str(user.id), "role": user.role})
+
+    async def get_db_session():
+        yield db_session
+
+    previous = app.dependency_overrides[get_session]
+    app.dependency_overrides[get_session] = get_db_session
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://localhost") as client:
+            sql_statements.clear()
+            response = await client.get("/api/v1/books/", headers={"Authorization": f"Bearer {token}"})
+            assert response.status_code == 403
+            [statement] = sql_statements
+            assert "FROM users" in statement and "books" not in statement
+
+            sql_statements.clear()
+            await client.get("/api/v1/books/", headers={"Authorization": f"Bearer {token}"})
+            assert sql_statements == []
+
+            await UserService().update_user(user, {"is_verified": True}, db_session)
+            response = await client.get("/api/v1/books/", headers={"Authorization": f"Bearer {token}"})
+            assert response.status_code == 200
+    finally:
+        app.dependency_overrides[get_session] = previous
+
+    assert in_memory_principals.stats()["loads"] == 2
+
+
+@pytest.mark.anyio
+async def test_password_hashing_runs_off_the_event_loop_with_a_bounded_queue():
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    ticker = asyncio.ensure_future(tick())
+    try:
+        results = await asyncio.gather(
+            *(hasher.hash(f"secret{i}") for i in range(3)), return_exceptions=True
+        )
+    finally:
+        ticker.cancel()
+
+    assert isinstance(results[2], PasswordHashingBusy)
+    assert ticks > 10
+    assert hasher.stats()["rejected"] == 1 and hasher.stats()["peak_pending"] == 2
+    assert await hasher.verify("secret0", results[0]) and not await hasher.verify("secret0", results[1])
+    hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_revocations_reach_other_workers_without_redis_lookups(in_memory_token_revocations):
+    this_worker = in_memory_token_revocations
+    other_worker = TokenRevocations(this_worker.client)
+    now = time.time()
+    await this_worker.revoke("before-start", now + 3600)
+
+    assert await other_worker.is_revoked("before-start")  # Redis, until the subscription is up
+    await asyncio.sleep(0)
+    assert other_worker.ready
+
+    await this_worker.revoke("logged-out", now + 2 * 24 * 3600)
+    await this_worker.revoke("already-expired", now - 1)
+    await asyncio.sleep(0.01)  # The listener's timed read takes a few loop iterations to wake.
+
+    assert await other_worker.is_revoked("before-start")
+    assert await other_worker.is_revoked("logged-out")
+    assert not await other_worker.is_revoked("already-expired")
+    assert not await other_worker.is_revoked("never-revoked")
+    assert other_worker.stats()["redis_checks"] == 1
+    assert await this_worker.client.zscore(REVOKED_KEY, "already-expired") is None
+
+
+@pytest.mark.anyio
+async def test_silent_revocation_subscription_falls_back_to_redis(in_memory_token_revocations, monkeypatch):
+    monkeypatch.setattr(revocations, "HEALTH_CHECK_SECONDS", 0.01)
+    monkeypatch.setattr(revocations, "RECONNECT_SECONDS", 60)
+    # A half-open connection: pings are sent but never answered.
+    monkeypatch.setattr(InMemoryPubSub, "ping", lambda self, message=None: asyncio.sleep(0))
+    token_revocations = in_memory_token_revocations
+
+    await token_revocations.is_revoked("anything")
+    await asyncio.sleep(0)
+    assert token_revocations.ready
+
+    await asyncio.sleep(0.1)
+    assert not token_revocations.ready
+    assert not await token_revocations.is_revoked("anything")
+    assert token_revocations.stats()["redis_checks"] == 2
+
+    await token_revocations.close()
+    assert token_revocations._listener is None
+
+
+def signup_payload(name):
+    return {
+        "username": name, "first_name": "first", "last_name": "last",
+        "email": f"{name}@example.com", "password": "secret2345",
+    }
+
+
+@pytest.mark.anyio
+async def test_signup_is_one_insert_and_maps_conflicts(api_client, sql_statements, monkeypatch):
+    monkeypatch.setattr(auth_routers.dispatch_email_outbox, "apply_async", lambda **options: None)
+
+    response = await api_client.post(f"{auth_prefix}/signup", json=signup_payload("reader"))
+    assert response.status_code == 200
+    assert [statement.split()[0] for statement in sql_statements] == ["INSERT", "INSERT"]
+    assert "INTO users" in sql_statements[1]
+
+    response = await api_client.post(f"{auth_prefix}/signup", json=signup_payload("reader"))
+    assert response.status_code == 403
+    assert response.json()["error_code"] == "user_exists"
+
+    response = await api_client.post(f"{auth_prefix}/signup", json=signup_payload("writer"))
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_bulk_provisioning_inserts_in_batches_and_skips_taken_accounts(
+    api_client, db_session, sql_statements, monkeypatch
+):
+    monkeypatch.setattr(user_services, "BULK_INSERT_BATCH_SIZE", 2)
+    app.dependency_overrides[auth_routers.admin_role_checker.dependency] = lambda: True
+    await UserService().create_user(UserSignupRequest(**signup_payload("taken")), db_session)
+    sql_statements.clear()
+
+    users = [signup_payload(name) for name in ("alice", "taken", "bobby", "alice")]
+    response = await api_client.post(f"{auth_prefix}/users/bulk", json={"users": users, "is_verified": True})
+
+    assert response.status_code == 201
+    assert response.json() == {"created": 2, "skipped": ["taken@example.com", "alice@example.com"]}
+    assert len([s for s in sql_statements if s.startswith("INSERT")]) == 2
+    user = await UserService().get_user_by_email("bobby@example.com", db_session)
+    assert user.is_verified and user.role == "user"
@@ -1,5 +1,21 @@
 
-from src.books.schemas import  BookCreateRequest
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.books import routes as book_routes
+from src.books.etags import book_detail_etag
+from src.books.dataloader import BookLoader, current_book_loader
+from src.books.models import Book, Review
+from src.books.schemas import  BookCreateRequest, BookEditRequest, BookPage
+from src.books.services import BookService, book_reads
+from src.errors import InvalidCursor
+from src.reviews.schemas import ReviewCreateRequest
+from src.reviews.services import ReviewService
 
 books_prefix = "/api/v1/books"
 def test_get_all_books(fake_session, fake_book_service, test_client):
@@ -24,3 +40,287 @@ def test_add_book(fake_session, fake_book_service, test_client):
 
     assert fake_book_service.create_book_called_once()
     assert fake_book_service.create_book_called_once_with(book_data, fake_session)
+
+
+async def add_books(session, count, user_id=None):
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        session.add(
+            Book(
+                title=f"book {i}",
+                author="author",
+                description="description",
+                user_id=user_id,
+                created_at=start + timedelta(minutes=i),
+                update_at=start + timedelta(minutes=i),
+            )
+        )
+    await session.commit()
+
+
+@pytest.mark.anyio
+async def test_get_all_books_pages_with_cursor(db_session):
+    await add_books(db_session, 5)
+    book_service = BookService()
+
+    first = await book_service.get_all_books(db_session, limit=2)
+    second = await book_service.get_all_books(db_session, limit=2, cursor=first.next_cursor)
+    last = await book_service.get_all_books(db_session, limit=2, cursor=second.next_cursor)
+
+    titles = [book.title for page in (first, second, last) for book in page.items]
+    assert titles == ["book 4", "book 3", "book 2", "book 1", "book 0"]
+    assert last.next_cursor is None
+
+
+@pytest.mark.anyio
+async def test_get_all_books_by_user_reuses_cursor(db_session):
+    user_id = uuid.uuid4()
+    await add_books(db_session, 3, user_id=user_id)
+    await add_books(db_session, 2)
+    book_service = BookService()
+
+    first = await book_service.get_all_books_by_user(user_id, db_session, limit=2)
+    second = await book_service.get_all_books_by_user(user_id, db_session, limit=2, cursor=first.next_cursor)
+
+    assert [book.title for book in first.items + second.items] == ["book 2", "book 1", "book 0"]
+    assert second.next_cursor is None
+
+
+@pytest.mark.anyio
+async def test_invalid_cursor_is_rejected(db_session):
+    with pytest.raises(InvalidCursor):
+        await BookService().get_all_books(db_session, cursor="not-a-cursor")
+
+
+def select_statements(statements):
+    return [statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]
+
+
+@pytest.mark.anyio
+async def test_list_routes_issue_one_select(db_session, api_client, sql_statements):
+    user_id = uuid.uuid4()
+    await add_books(db_session, 3, user_id=user_id)
+    sql_statements.clear()
+
+    response = await api_client.get(f"{books_prefix}/")
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 3
+    assert len(select_statements(sql_statements)) == 1
+    assert "reviews" not in sql_statements[-1]
+
+    sql_statements.clear()
+    response = await api_client.get(f"{books_prefix}/users/{user_id}")
+    assert response.status_code == 200
+    assert len(select_statements(sql_statements)) == 1
+
+
+@pytest.mark.anyio
+async def test_detail_route_loads_reviews_explicitly(db_session, api_client, sql_statements):
+    await add_books(db_session, 1)
+    book = (await BookService().get_all_books(db_session)).items[0]
+    db_session.add(Review(review_text="great", rating=4, book_id=book.id, user_id=uuid.uuid4()))
+    await db_session.commit()
+    db_session.expunge_all()
+    sql_statements.clear()
+
+    response = await api_client.get(f"{books_prefix}/{book.id}")
+    assert response.status_code == 200
+    assert len(response.json()["reviews"]) == 1
+    assert len(select_statements(sql_statements)) == 2
+
+
+@pytest.mark.anyio
+async def test_book_detail_is_served_from_cache_until_updated(
+    db_session, api_client, sql_statements, in_memory_book_cache
+):
+    await add_books(db_session, 1)
+    book = (await BookService().get_all_books(db_session)).items[0]
+    sql_statements.clear()
+
+    first = await api_client.get(f"{books_prefix}/{book.id}")
+    second = await api_client.get(f"{books_prefix}/{book.id}")
+    assert first.json() == second.json()
+    assert len(select_statements(sql_statements)) == 2
+    assert in_memory_book_cache.stats()["hits"] == 1
+    assert in_memory_book_cache.stats()["misses"] == 1
+
+    await BookService().update_book(book.id, BookEditRequest(title="renamed"), db_session)
+    response = await api_client.get(f"{books_prefix}/{book.id}")
+    assert response.json()["title"] == "renamed"
+    assert in_memory_book_cache.stats()["misses"] == 2
+
+
+@pytest.mark.anyio
+async def test_export_streams_ndjson_with_filters(db_engine, db_session, api_client, monkeypatch):
+    sessions = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(book_routes, "async_session_factory", sessions)
+    user_id = uuid.uuid4()
+    await add_books(db_session, 3, user_id=user_id)
+    await add_books(db_session, 2)
+
+    response = await api_client.get(
+        f"{books_prefix}/export", params={"user_id": str(user_id), "created_after": "2024-01-01T00:01:00"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["book 1", "book 2"]
+
+
+@pytest.mark.anyio
+async def test_book_routes_answer_conditional_requests(db_session, api_client, sql_statements, in_memory_book_cache):
+    await add_books(db_session, 2)
+    book = (await BookService().get_all_books(db_session)).items[0]
+
+    listing = await api_client.get(f"{books_prefix}/")
+    assert listing.headers["etag"]
+    cached = await api_client.get(f"{books_prefix}/", headers={"If-None-Match": listing.headers["etag"]})
+    assert cached.status_code == 304
+
+    detail = await api_client.get(f"{books_prefix}/{book.id}")
+    etag = detail.headers["etag"]
+    assert (await api_client.get(f"{books_prefix}/{book.id}", headers={"If-None-Match": etag})).status_code == 304
+
+    # With the cache cold only the timestamp query runs.
+    await in_memory_book_cache.invalidate(book.id)
+    sql_statements.clear()
+    response = await api_client.get(f"{books_prefix}/{book.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert len(select_statements(sql_statements)) == 1
+
+    await ReviewService().add_review_to_book(
+        uuid.uuid4(), book.id, ReviewCreateRequest(review_text="new", rating=3), db_session
+    )
+    db_session.expunge_all()
+    response = await api_client.get(f"{books_prefix}/{book.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.anyio
+async def test_update_and_delete_are_single_statements(db_session, sql_statements):
+    await add_books(db_session, 1)
+    book = (await BookService().get_all_books(db_session)).items[0]
+    book_id, previous_update_at = book.id, book.update_at
+    sql_statements.clear()
+
+    updated = await BookService().update_book(book_id, BookEditRequest(title="renamed"), db_session)
+    assert updated.title == "renamed"
+    assert updated.author == "author"
+    assert updated.update_at > previous_update_at
+    assert len(sql_statements) == 1
+
+    # Two edits within the same second still get distinct timestamps, and so distinct ETags.
+    again = await BookService().update_book(book_id, BookEditRequest(title="renamed again"), db_session)
+    assert again.update_at > updated.update_at
+    assert book_detail_etag(book_id, again.update_at, None) != book_detail_etag(book_id, updated.update_at, None)
+
+    sql_statements.clear()
+    assert await BookService().delete_book_by_id(book_id, db_session) == {}
+    assert await BookService().delete_book_by_id(book_id, db_session) is None
+    assert len(sql_statements) == 2
+
+
+@pytest.mark.anyio
+async def test_batch_route_keeps_order_and_reports_missing(db_session, api_client, sql_statements):
+    await add_books(db_session, 3)
+    books = (await BookService().get_all_books(db_session)).items
+    missing_id = uuid.uuid4()
+    requested = [books[2].id, missing_id, books[0].id]
+    db_session.expunge_all()
+    sql_statements.clear()
+
+    response = await api_client.get(f"{books_prefix}/batch", params={"ids": ",".join(map(str, requested))})
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == [str(books[2].id), str(books[0].id)]
+    assert response.json()["missing"] == [str(missing_id)]
+    assert len(select_statements(sql_statements)) == 1
+
+    response = await api_client.post(f"{books_prefix}/batch", json={"ids": [str(books[1].id)]})
+    assert [item["title"] for item in response.json()["items"]] == ["book 1"]
+
+    response = await api_client.get(f"{books_prefix}/batch", params={"ids": "not-a-uuid"})
+    assert response.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_book_loader_coalesces_get_book_by_id(db_session, sql_statements):
+    await add_books(db_session, 3)
+    book_ids = [book.id for book in (await BookService().get_all_books(db_session)).items]
+    db_session.expunge_all()
+    sql_statements.clear()
+
+    book_loader = BookLoader(db_session)
+    token = current_book_loader.set(book_loader)
+    try:
+        books = await asyncio.gather(*(BookService().get_book_by_id(book_id, db_session) for book_id in book_ids))
+    finally:
+        current_book_loader.reset(token)
+
+    assert [book.id for book in books] == book_ids
+    assert book_loader.batches == 1
+    # The detail loader only joins the stats row; reviews are paged separately.
+    assert len(select_statements(sql_statements)) == 1
+
+
+@pytest.mark.anyio
+async def test_coalesced_reads_outlive_a_cancelled_leader(db_engine, db_session):
+    await add_books(db_session, 2)
+    executions = book_reads.executions
+    leader_session = AsyncSession(db_engine, expire_on_commit=False)
+    leader = asyncio.ensure_future(BookService().get_all_books(leader_session))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(BookService().get_all_books(db_session))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await leader_session.close()
+    page = await follower
+
+    assert book_reads.executions == executions + 1
+    assert isinstance(page, BookPage)
+    assert [book.title for book in page.items] == ["book 1", "book 0"]
+    assert not any(isinstance(book, Book) for book in page.items)
+
+
+@pytest.mark.anyio
+async def test_list_etag_changes_when_a_review_changes_the_embedded_stats(db_session, api_client):
+    await add_books(db_session, 1)
+    book = (await BookService().get_all_books(db_session)).items[0]
+    etag = (await api_client.get(f"{books_prefix}/")).headers["etag"]
+
+    await ReviewService().add_review_to_book(
+        uuid.uuid4(), book.id, ReviewCreateRequest(review_text="new", rating=5), db_session
+    )
+    db_session.expunge_all()
+
+    response = await api_client.get(f"{books_prefix}/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["items"][0]["stats"] == {"review_count": 1, "average_rating": 5}
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.anyio
+async def test_concurrent_detail_reads_do_not_exhaust_a_small_pool(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", pool_size=2, max_overflow=0, pool_timeout=2
+    )
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with sessions() as session:
+            await add_books(session, 6)
+            book_ids = [book.id for book in (await BookService().get_all_books(session)).items]
+
+        async def conditional_detail(book_id):
+            async with sessions() as session:
+                # The ETag query leaves the request session holding a connection.
+                return await BookService().get_book_detail(book_id, session, if_none_match='"stale"')
+
+        reads = asyncio.gather(*(conditional_detail(book_id) for book_id in book_ids))
+        payloads = await asyncio.wait_for(reads, timeout=10)
+        assert all(payload.body for payload in payloads)
+    finally:
+        await engine.dispose()
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import text
+
+from src.config import Config
+from src.db.main import PoolMonitor, engine_options
+
+
+def test_engine_options_tune_the_pool_and_asyncpg_statement_cache(monkeypatch):
+    monkeypatch.setattr(Config, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(Config, "DB_STATEMENT_CACHE_SIZE", 0)
+
+    options = engine_options("postgresql+asyncpg://u:p@localhost/db")
+    assert options["pool_size"] == 7
+    assert options["connect_args"]["statement_cache_size"] == 0
+    assert options["connect_args"]["prepared_statement_cache_size"] == 0
+    assert "connect_args" not in engine_options("sqlite+aiosqlite:///bookly.db")
+    assert engine_options("sqlite+aiosqlite://") == {}
+
+
+@pytest.mark.anyio
+async def test_pool_monitor_tracks_checkouts(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}"
+    engine = create_async_engine(url, **{**engine_options(url), "pool_size": 2, "max_overflow": 1})
+    monitor = PoolMonitor(engine)
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(text("SELECT 1"))
+            await second.execute(text("SELECT 1"))
+            assert monitor.stats()["checked_out"] == 2
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+        stats = monitor.stats()
+        assert (stats["checked_out"], stats["peak_checked_out"]) == (0, 2)
+        assert (stats["checkouts"], stats["connects"]) == (3, 2)
+        assert (stats["size"], stats["checked_in"]) == (2, 2)
+    finally:
+        await engine.dispose()
@@ -0,0 +1,79 @@
+import io
+import json
+import uuid
+import pytest
+from src.books.importer import BookImporter, main
+from src.books.services import BookService
+
+books_prefix = "/api/v1/books"
+
+
+def ndjson(*rows):
+    return "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows).encode()
+
+
+@pytest.mark.anyio
+async def test_import_reports_bad_rows_and_keeps_the_rest(db_session):
+    payload = ndjson(
+        {"title": "one", "author": "a", "description": "d"},
+        "{not json",
+        {"title": "two", "author": "a"},
+        {"title": "three", "author": "a", "description": "d"},
+    )
+
+    report = await BookImporter(chunk_size=2).import_stream(io.BytesIO(payload), "ndjson", uuid.uuid4(), db_session)
+
+    assert report.inserted == 2
+    assert report.failed == 2
+    assert [error.row for error in report.errors] == [2, 3]
+    page = await BookService().get_all_books(db_session)
+    assert {book.title for book in page.items} == {"one", "three"}
+
+
+@pytest.mark.anyio
+async def test_import_route_accepts_csv_upload(db_session, admin_client):
+    csv_body = b"title,author,description\nDune,Frank Herbert,Sand\nEmma,Jane Austen,\n"
+
+    response = await admin_client.post(
+        f"{books_prefix}/import", files={"file": ("books.csv", csv_body, "text/csv")}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 2
+    assert response.json()["failed"] == 0
+
+
+def test_cli_requires_a_known_format(tmp_path):
+    path = tmp_path / "books.txt"
+    path.write_text("")
+    with pytest.raises(SystemExit):
+        main([str(path)])
+
+
+@pytest.mark.anyio
+async def test_import_reports_undecodable_lines_and_keeps_the_rest(db_session):
+    payload = ndjson({"title": "one", "author": "a", "description": "d"}) + b"\n\xff\xfe\n" + ndjson(
+        {"title": "two", "author": "a", "description": "d"}
+    )
+    csv_body = b"title,author,description\nDune,Herbert,d\nEmma,\xff\xfe,d\nPersuasion,Austen,d\n"
+
+    report = await BookImporter().import_stream(io.BytesIO(payload), "ndjson", None, db_session)
+    csv_report = await BookImporter().import_stream(io.BytesIO(csv_body), "csv", None, db_session)
+
+    assert (report.inserted, [(error.row, error.message) for error in report.errors]) == (2, [(2, "Invalid UTF-8")])
+    assert (csv_report.inserted, [(error.row, error.message) for error in csv_report.errors]) == (
+        2, [(2, "Invalid UTF-8")]
+    )
+
+
+@pytest.mark.anyio
+async def test_import_reports_oversized_csv_fields_and_keeps_the_rest(db_session):
+    csv_body = f"title,author,description\nDune,Herbert,d\n\"{'x' * 200_000}\",a,d\nEmma,Austen,d\n".encode()
+
+    report = await BookImporter().import_stream(io.BytesIO(csv_body), "csv", None, db_session)
+
+    assert report.inserted == 2
+    assert [error.row for error in report.errors] == [2]
+    assert report.errors[0].message.startswith("Invalid CSV: field larger than field limit")
+    page = await BookService().get_all_books(db_session)
+    assert {book.title for book in page.items} == {"Dune", "Emma"}
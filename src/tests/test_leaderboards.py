@@ -0,0 +1,85 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.books.leaderboards import TOP_KEY
+from src.books.models import Book, Review
+from src.books.stats import BookStatsService
+from src.reviews.schemas import ReviewCreateRequest
+from src.reviews.services import ReviewService
+
+books_prefix = "/api/v1/books"
+
+
+async def add_books(session, *titles):
+    books = [Book(title=title, author="author", description="description") for title in titles]
+    session.add_all(books)
+    await session.commit()
+    return books
+
+
+async def review(session, book, *ratings):
+    review_service = ReviewService()
+    return [
+        await review_service.add_review_to_book(
+            uuid.uuid4(), book.id, ReviewCreateRequest(review_text="", rating=rating), session
+        )
+        for rating in ratings
+    ]
+
+
+@pytest.mark.anyio
+async def test_top_books_need_minimum_review_count(db_session, api_client, in_memory_leaderboards):
+    good, great, unrated = await add_books(db_session, "good", "great", "unrated")
+    in_memory_leaderboards.min_reviews = 2
+    await review(db_session, good, 4, 3)
+    await review(db_session, great, 5, 5)
+    await review(db_session, unrated, 5)
+
+    response = await api_client.get(f"{books_prefix}/top")
+    assert response.status_code == 200
+    assert [(entry["book"]["title"], entry["score"]) for entry in response.json()] == [
+        ("great", 5.0),
+        ("good", 3.5),
+    ]
+
+    reviews = await review(db_session, unrated, 5)
+    await ReviewService().delete_review(reviews[0].id, reviews[0].user_id, db_session)
+    assert [book_id for book_id, _ in await in_memory_leaderboards.top(10)] == [great.id, good.id]
+
+
+@pytest.mark.anyio
+async def test_trending_counts_reviews_in_window(db_session, api_client, in_memory_leaderboards):
+    quiet, busy = await add_books(db_session, "quiet", "busy")
+    await review(db_session, quiet, 3)
+    await review(db_session, busy, 3, 4)
+
+    response = await api_client.get(f"{books_prefix}/trending", params={"limit": 1})
+    assert [(entry["book"]["title"], entry["score"]) for entry in response.json()] == [("busy", 2.0)]
+
+    later = datetime.now() + timedelta(hours=in_memory_leaderboards.window_hours)
+    assert await in_memory_leaderboards.trending(10, now=later) == []
+
+
+@pytest.mark.anyio
+async def test_rebuild_recovers_from_drift(db_session, in_memory_leaderboards):
+    book, stale = await add_books(db_session, "book", "stale")
+    in_memory_leaderboards.min_reviews = 1
+    now = datetime.now()
+    for hours_ago in (0, 1, 48):
+        created_at = now - timedelta(hours=hours_ago)
+        db_session.add(
+            Review(
+                review_text="", rating=4, book_id=book.id, user_id=uuid.uuid4(),
+                created_at=created_at, update_at=created_at,
+            )
+        )
+    await db_session.commit()
+    await in_memory_leaderboards.client.zadd(TOP_KEY, {str(stale.id): 5})
+
+    await BookStatsService().rebuild(db_session)
+    assert await in_memory_leaderboards.rebuild(db_session, now=now) == {"top": 1, "trending": 1}
+
+    assert [book_id for book_id, _ in await in_memory_leaderboards.top(10)] == [book.id]
+    assert await in_memory_leaderboards.trending(10, now=now) == [(book.id, 2.0)]
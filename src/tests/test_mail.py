@@ -0,0 +1,192 @@
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi_mail import ConnectionConfig
+from kombu.exceptions import OperationalError
+from sqlmodel import select
+
+from src import celery_tasks
+from src.auth import routers as auth_routers
+from src.mail import SMTPPool, build_email, create_message, email_templates
+from src.outbox import EmailOutbox, OutboxEmail
+from src.tests.test_auth import signup_payload
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.sessions = set()
+        self.subjects = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        subject = next(line for line in envelope.content.splitlines() if line.startswith(b"Subject:"))
+        self.subjects.append(subject.split(b":", 1)[1].strip().decode())
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_sink():
+    aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+    port = free_port()
+    handler = RecordingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield handler, port
+    controller.stop()
+
+
+def sink_pool(port, **kwargs):
+    config = ConnectionConfig(
+        MAIL_USERNAME="", MAIL_PASSWORD="", MAIL_FROM="bookly@example.com", MAIL_PORT=port,
+        MAIL_SERVER="127.0.0.1", MAIL_STARTTLS=False, MAIL_SSL_TLS=False, USE_CREDENTIALS=False,
+        VALIDATE_CERTS=False,
+    )
+    return SMTPPool(config, **{"size": 1, "max_idle_seconds": 60, "max_messages": 100, **kwargs})
+
+
+def test_build_email_uses_only_public_message_fields():
+    message = create_message(recipients=["reader@example.com"], subject="Verify your email", body="<p>hi</p>")
+    message.bcc = ["audit@example.com"]
+
+    email = build_email(message, "Bookly <bookly@example.com>")
+
+    assert (email["From"], email["To"], email["Bcc"]) == (
+        "Bookly <bookly@example.com>", "reader@example.com", "audit@example.com"
+    )
+    assert email["Subject"] == "Verify your email"
+    assert email["Message-ID"] and email["Date"]
+    assert email.get_content_type() == "text/html"
+    assert email.get_content().strip() == "<p>hi</p>"
+
+
+@pytest.mark.anyio
+async def test_smtp_pool_reuses_one_session_and_rotates_at_the_message_cap(smtp_sink):
+    handler, port = smtp_sink
+    pool = sink_pool(port, max_messages=3)
+    messages = [
+        create_message(recipients=[f"reader{i}@example.com"], subject=f"hello {i}", body="hi") for i in range(5)
+    ]
+
+    result = await pool.send(messages[:4])
+    result_after = await pool.send(messages[4:])
+    await pool.close()
+
+    assert result == {"sent": 4, "failed": []} and result_after["sent"] == 1
+    assert handler.subjects == [f"hello {i}" for i in range(5)]
+    assert pool.stats()["connects"] == len(handler.sessions) == 2
+
+
+def test_send_email_task_uses_its_subject_and_keeps_the_session(smtp_sink, monkeypatch):
+    handler, port = smtp_sink
+    pool = sink_pool(port)
+    monkeypatch.setattr(celery_tasks, "smtp_pool", pool)
+
+    celery_tasks.send_email.run(["reader@example.com"], "Bookly Account Activated", "<h1>hi</h1>")
+    celery_tasks.send_email_batch.run(
+        [{"recipients": ["writer@example.com"], "subject": "Reset your password", "body": "<p>link</p>"}]
+    )
+
+    assert handler.subjects == ["Bookly Account Activated", "Reset your password"]
+    assert pool.stats()["connects"] == 1
+    celery_tasks.worker_loop.run(pool.close())
+
+
+@pytest.mark.anyio
+async def test_email_paths_commit_to_the_outbox_instead_of_sending(api_client, db_session, monkeypatch):
+    kicks = []
+    monkeypatch.setattr(auth_routers.dispatch_email_outbox, "apply_async", lambda **options: kicks.append(options))
+    signup = signup_payload("reader")
+
+    await api_client.post("/api/v1/auth/signup", json=signup)
+    response = await api_client.post("/api/v1/auth/signup", json=signup)
+    assert response.status_code == 403
+    response = await api_client.post("/api/v1/auth/reset-password", json={"email": "reader@example.com"})
+    assert response.status_code == 200
+
+    db_session.expunge_all()
+    emails = (await db_session.exec(select(OutboxEmail).order_by(OutboxEmail.created_at))).all()
+    assert [email.subject for email in emails] == ["Verify your email", "Reset your password"]
+    assert kicks == [{"retry": False}] * 2
+
+
+@pytest.mark.anyio
+async def test_auth_emails_succeed_when_the_broker_is_down(api_client, db_session, monkeypatch):
+    def broker_down(**options):
+        raise OperationalError("Error 111 connecting to localhost:6379. Connection refused.")
+
+    monkeypatch.setattr(auth_routers.dispatch_email_outbox, "apply_async", broker_down)
+    signup = signup_payload("reader")
+
+    response = await api_client.post("/api/v1/auth/signup", json=signup)
+    assert response.status_code == 200
+    response = await api_client.post("/api/v1/auth/reset-password", json={"email": "reader@example.com"})
+    assert response.status_code == 200
+
+    db_session.expunge_all()
+    emails = (await db_session.exec(select(OutboxEmail))).all()
+    assert sorted(email.subject for email in emails) == ["Reset your password", "Verify your email"]
+
+
+@pytest.mark.anyio
+async def test_outbox_dispatch_sends_in_batches_and_backs_off_failures(db_session, smtp_sink):
+    handler, port = smtp_sink
+    outbox = EmailOutbox(batch_size=2, max_attempts=2, base_delay=30, max_delay=3600)
+    for i in range(3):
+        outbox.enqueue(db_session, [f"reader{i}@example.com"], f"hello {i}", "hi")
+    await db_session.commit()
+
+    assert await outbox.dispatch(db_session, sink_pool(port)) == {"sent": 3, "retrying": 0, "failed": 0}
+    assert sorted(handler.subjects) == ["hello 0", "hello 1", "hello 2"]
+
+    email = outbox.enqueue(db_session, ["reader@example.com"], "later", "hi")
+    await db_session.commit()
+    unreachable = sink_pool(free_port())
+    assert await outbox.dispatch(db_session, unreachable) == {"sent": 0, "retrying": 1, "failed": 0}
+    assert email.attempts == 1 and email.next_attempt_at > datetime.now() + timedelta(seconds=25)
+    assert await outbox.dispatch(db_session, unreachable) == {"sent": 0, "retrying": 0, "failed": 0}
+
+    email.next_attempt_at = datetime.now()
+    await db_session.commit()
+    assert await outbox.dispatch(db_session, unreachable) == {"sent": 0, "retrying": 0, "failed": 1}
+    assert email.failed_at is not None and email.last_error
+
+
+def test_email_templates_render_personalized_and_escaped():
+    assert email_templates.warm() == 5
+    first, second = email_templates.render_many(
+        "email/verify_email.html",
+        [
+            {"first_name": "Ada", "link": "http://bookly/verify/1"},
+            {"first_name": "<b>Bob</b>", "link": "http://bookly/verify/2"},
+        ],
+    )
+
+    assert "Welcome to Bookly, Ada" in first and 'href="http://bookly/verify/1"' in first
+    assert "&lt;b&gt;Bob&lt;/b&gt;" in second
+
+
+@pytest.mark.anyio
+async def test_outbox_renders_templates_in_the_worker(db_session, smtp_sink):
+    handler, port = smtp_sink
+    outbox = EmailOutbox(batch_size=10, max_attempts=3, base_delay=30, max_delay=3600)
+    outbox.enqueue(
+        db_session, ["a@example.com"], "Reset your password",
+        template="email/password_reset.html", context={"link": "x"},
+    )
+    outbox.enqueue(
+        db_session, ["b@example.com"], "Activated",
+        template="email/account_activated.html", context={"first_name": "Bo"},
+    )
+    broken = outbox.enqueue(db_session, ["c@example.com"], "Broken", template="email/missing.html")
+    await db_session.commit()
+
+    assert await outbox.dispatch(db_session, sink_pool(port)) == {"sent": 2, "retrying": 1, "failed": 0}
+    assert handler.subjects == ["Reset your password", "Activated"]
+    assert "email/missing.html" in broken.last_error
@@ -0,0 +1,133 @@
+"""EXPLAIN every request-path service query against a seeded Postgres database.
+
+Runs only when ``TEST_POSTGRES_URL`` points at a disposable database, e.g.
+``postgresql+asyncpg://postgres@localhost/bookly_test``. The schema is built
+by running the Alembic migrations, so the indexes checked are the ones that
+ship.
+"""
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.auth.services import UserService
+from src.books.services import BookService
+from src.books.stats import BookStatsService
+from src.reviews.schemas import ReviewSort
+from src.reviews.services import ReviewService
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+ROOT = Path(__file__).resolve().parents[2]
+SEQ_SCAN_ROW_THRESHOLD = 1000
+
+pytestmark = pytest.mark.skipif(POSTGRES_URL is None, reason="TEST_POSTGRES_URL is not set")
+
+SEED = """
+TRUNCATE users, books, reviews, book_stats CASCADE;
+INSERT INTO users (id, username, first_name, last_name, email, role, password, is_verified, created_at, update_at)
+SELECT gen_random_uuid(), 'user' || i, 'first', 'last', 'user' || i || '@example.com', 'user', 'x', true, now(), now()
+FROM generate_series(1, 500) AS i;
+INSERT INTO books (id, user_id, title, author, description, created_at, update_at)
+SELECT gen_random_uuid(), (SELECT id FROM users ORDER BY random() + i LIMIT 1),
+       'book ' || i, 'author ' || (i % 300), 'a story about ' || md5(i::text),
+       now() - i * interval '1 minute', now() - i * interval '1 minute'
+FROM generate_series(1, 20000) AS i;
+INSERT INTO reviews (id, user_id, book_id, review_text, rating, created_at, update_at)
+SELECT gen_random_uuid(), users.id, books.id, 'review', 1 + (random() * 4)::int,
+       now() - random() * interval '30 days', now()
+FROM (SELECT id, row_number() OVER () AS n FROM books) AS books
+JOIN LATERAL (SELECT id FROM users ORDER BY random() + books.n LIMIT 3) AS users ON true;
+"""
+
+
+def seq_scans(plan: dict, table_rows: dict):
+    if plan["Node Type"] == "Seq Scan" and table_rows.get(plan["Relation Name"], 0) > SEQ_SCAN_ROW_THRESHOLD:
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", ()):
+        yield from seq_scans(child, table_rows)
+
+
+@pytest.fixture
+async def seeded_engine():
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=ROOT,
+        env={**os.environ, "DB_URL": POSTGRES_URL},
+        check=True,
+        capture_output=True,
+    )
+    engine = create_async_engine(POSTGRES_URL)
+    async with engine.begin() as conn:
+        for statement in SEED.split(";"):
+            if statement.strip():
+                await conn.execute(text(statement))
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        await BookStatsService().rebuild(session)
+    # VACUUM also flushes the GIN pending list the bulk insert left behind.
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE"))
+    yield engine
+    await engine.dispose()
+
+
+async def run_service_queries(session: AsyncSession):
+    book_service = BookService()
+    book_id, user_id = (await session.exec(text("SELECT id, user_id FROM books LIMIT 1"))).one()
+    email = (await session.exec(text("SELECT email FROM users LIMIT 1"))).scalar_one()
+
+    first_page = await book_service.get_all_books(session)
+    await book_service.get_all_books(session, cursor=first_page.next_cursor)
+    await book_service.get_all_books_by_user(user_id, session)
+    await book_service.search_books(hashlib.md5(b"42").hexdigest(), session)
+    await book_service.get_books_by_ids([book_id, uuid.uuid4()], session)
+    await book_service.get_book_detail_etag(book_id, session)
+    async for _ in book_service.stream_books(session, user_id=user_id, created_after=datetime(2000, 1, 1)):
+        pass
+    session.expunge_all()
+    await book_service.get_book_by_id(book_id, session)
+    await UserService().get_user_by_email(email, session)
+    for sort in ReviewSort:
+        page = await ReviewService().get_book_reviews(book_id, session, sort, limit=1)
+        await ReviewService().get_book_reviews(book_id, session, sort, limit=1, cursor=page.next_cursor)
+
+
+@pytest.mark.anyio
+async def test_service_queries_avoid_large_sequential_scans(seeded_engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(seeded_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        async with AsyncSession(seeded_engine, expire_on_commit=False) as session:
+            await run_service_queries(session)
+    finally:
+        event.remove(seeded_engine.sync_engine, "before_cursor_execute", record)
+
+    failures = []
+    async with seeded_engine.connect() as conn:
+        rows = await conn.execute(text("SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'"))
+        table_rows = dict(rows.all())
+        for statement, parameters in statements:
+            if "FROM books LIMIT 1" in statement or "FROM users LIMIT 1" in statement:
+                continue
+            result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = result.scalar_one()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            for table in seq_scans(plan[0]["Plan"], table_rows):
+                failures.append(f"Seq Scan on {table}:\n{statement}")
+
+    assert statements
+    assert not failures, "\n\n".join(failures)
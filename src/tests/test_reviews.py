@@ -0,0 +1,284 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.books import services as book_services
+from src.books.bloom import BloomFilter
+from src.books.models import Book, BookStats, Review
+from src.books.stats import BookStatsService
+from src.reviews import services as review_services
+from src.reviews.batcher import ReviewWriteBatcher
+from src.reviews.schemas import ReviewCreateRequest
+from src.reviews.services import ReviewService
+
+books_prefix = "/api/v1/books"
+reviews_prefix = "/api/v1/reviews"
+
+
+async def add_book(session):
+    book = Book(title="dune", author="herbert", description="spice")
+    session.add(book)
+    await session.commit()
+    return book
+
+
+@pytest.mark.anyio
+async def test_review_writes_keep_book_stats_in_step(db_session):
+    book = await add_book(db_session)
+    user_id = uuid.uuid4()
+    review_service = ReviewService()
+
+    first = await review_service.add_review_to_book(
+        user_id, book.id, ReviewCreateRequest(review_text="good", rating=4), db_session
+    )
+    await review_service.add_review_to_book(
+        user_id, book.id, ReviewCreateRequest(review_text="meh", rating=2), db_session
+    )
+    await review_service.delete_review(first.id, user_id, db_session)
+    db_session.expunge_all()
+
+    stats = await BookStatsService().get_stats(book.id, db_session)
+    assert (stats.review_count, stats.rating_sum) == (1, 2)
+    assert stats.histogram == {1: 0, 2: 1, 3: 0, 4: 0, 5: 0}
+    assert stats.average_rating == 2
+
+
+@pytest.mark.anyio
+async def test_delete_review_is_limited_to_its_author(db_session):
+    book = await add_book(db_session)
+    review_service = ReviewService()
+    review = await review_service.add_review_to_book(
+        uuid.uuid4(), book.id, ReviewCreateRequest(review_text="good", rating=5), db_session
+    )
+
+    assert await review_service.delete_review(review.id, uuid.uuid4(), db_session) is None
+    assert (await db_session.exec(select(Review))).all()
+
+
+@pytest.mark.anyio
+async def test_rebuild_recomputes_stats_from_reviews(db_session, in_memory_book_cache):
+    book = await add_book(db_session)
+    await in_memory_book_cache.set_detail(book.id, b'"etag"\n{}')
+    for rating in (5, 5, 3):
+        db_session.add(Review(review_text="", rating=rating, book_id=book.id, user_id=uuid.uuid4()))
+    db_session.add(BookStats(book_id=uuid.uuid4(), review_count=7, rating_sum=7))
+    await db_session.commit()
+
+    # The missing row is added and the orphaned one removed.
+    assert await BookStatsService().rebuild(db_session) == 2
+    db_session.expunge_all()
+
+    stats = (await db_session.exec(select(BookStats))).all()
+    assert [(row.book_id, row.review_count, row.rating_sum, row.stars_5) for row in stats] == [
+        (book.id, 3, 13, 2)
+    ]
+    assert stats[0].average_rating == 4.33
+    assert stats[0].update_at > book.update_at
+    assert await in_memory_book_cache.get_detail(book.id) is None
+
+    # Rows that are already right keep their timestamp, and so their ETag and cache entry.
+    await in_memory_book_cache.set_detail(book.id, b'"etag"\n{}')
+    assert await BookStatsService().rebuild(db_session) == 0
+    db_session.expunge_all()
+    assert (await BookStatsService().get_stats(book.id, db_session)).update_at == stats[0].update_at
+    assert await in_memory_book_cache.get_detail(book.id) is not None
+
+
+@pytest.mark.anyio
+async def test_book_routes_embed_rating_stats(db_session, api_client, sql_statements):
+    book = await add_book(db_session)
+    response = await api_client.post(
+        f"{reviews_prefix}/book/{book.id}", json={"review_text": "good", "rating": 4}
+    )
+    assert response.status_code == 201
+    db_session.expunge_all()
+    sql_statements.clear()
+
+    response = await api_client.get(f"{books_prefix}/")
+    assert response.json()["items"][0]["stats"] == {"review_count": 1, "average_rating": 4}
+    assert len([s for s in sql_statements if s.lstrip().upper().startswith("SELECT")]) == 1
+
+    response = await api_client.get(f"{books_prefix}/{book.id}")
+    assert response.json()["stats"]["histogram"] == {"1": 0, "2": 0, "3": 0, "4": 1, "5": 0}
+
+
+@pytest.mark.anyio
+async def test_review_rating_must_be_between_one_and_five(db_session, api_client):
+    book = await add_book(db_session)
+    response = await api_client.post(
+        f"{reviews_prefix}/book/{book.id}", json={"review_text": "wow", "rating": 9}
+    )
+    assert response.status_code == 422
+
+
+async def add_reviews(session, book, ratings):
+    start = datetime(2024, 1, 1)
+    for i, rating in enumerate(ratings):
+        session.add(
+            Review(
+                review_text=f"review {i}", rating=rating, book_id=book.id, user_id=uuid.uuid4(),
+                created_at=start + timedelta(minutes=i), update_at=start + timedelta(minutes=i),
+            )
+        )
+    await session.commit()
+
+
+@pytest.mark.anyio
+async def test_book_reviews_page_by_newest_and_rating(db_session, api_client):
+    book = await add_book(db_session)
+    await add_reviews(db_session, book, [3, 5, 1, 5, 2])
+
+    texts = []
+    cursor = None
+    for _ in range(3):
+        params = {"sort": "rating", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = (await api_client.get(f"{reviews_prefix}/book/{book.id}", params=params)).json()
+        texts += [review["review_text"] for review in page["items"]]
+        cursor = page["next_cursor"]
+    assert texts == ["review 3", "review 1", "review 0", "review 4", "review 2"]
+    assert cursor is None
+
+    newest = (await api_client.get(f"{reviews_prefix}/book/{book.id}", params={"limit": 2})).json()
+    assert [review["review_text"] for review in newest["items"]] == ["review 4", "review 3"]
+
+    response = await api_client.get(f"{reviews_prefix}/book/{book.id}", params={"sort": "oldest"})
+    assert response.status_code == 422
+    response = await api_client.get(f"{reviews_prefix}/book/{uuid.uuid4()}")
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_book_detail_embeds_first_review_page(db_session, api_client, monkeypatch):
+    monkeypatch.setattr(book_services, "REVIEW_PREVIEW_SIZE", 2)
+    book = await add_book(db_session)
+    await add_reviews(db_session, book, [4, 4, 4])
+
+    detail = (await api_client.get(f"{books_prefix}/{book.id}")).json()
+    assert [review["review_text"] for review in detail["reviews"]] == ["review 2", "review 1"]
+
+    rest = await api_client.get(
+        f"{reviews_prefix}/book/{book.id}", params={"cursor": detail["reviews_next_cursor"]}
+    )
+    assert [review["review_text"] for review in rest.json()["items"]] == ["review 0"]
+
+
+@pytest.fixture
+def review_batcher(db_engine, monkeypatch):
+    sessions = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    batcher = ReviewWriteBatcher(window_ms=20, max_size=100, session_factory=sessions)
+    monkeypatch.setattr(review_services, "review_write_batcher", batcher)
+    return batcher
+
+
+@pytest.mark.anyio
+async def test_batched_review_writes_share_one_transaction(db_session, review_batcher, sql_statements):
+    book = await add_book(db_session)
+    sql_statements.clear()
+
+    reviews = await asyncio.gather(
+        *(
+            ReviewService().add_review_to_book(
+                uuid.uuid4(), book.id, ReviewCreateRequest(review_text=f"review {i}", rating=i % 5 + 1), db_session
+            )
+            for i in range(10)
+        )
+    )
+
+    assert [review.review_text for review in reviews] == [f"review {i}" for i in range(10)]
+    assert review_batcher.stats()["batches"] == 1
+    assert len([s for s in sql_statements if s.lstrip().upper().startswith("INSERT")]) == 2
+    stats = await BookStatsService().get_stats(book.id, db_session)
+    assert (stats.review_count, stats.rating_sum) == (10, 30)
+
+
+@pytest.mark.anyio
+async def test_failed_review_batch_retries_each_review(db_session, review_batcher):
+    book = await add_book(db_session)
+    review_batcher.max_size = 3
+    broken = ReviewCreateRequest.model_construct(review_text=None, rating=5)
+
+    results = await asyncio.gather(
+        review_batcher.add(uuid.uuid4(), book.id, ReviewCreateRequest(review_text="good", rating=4)),
+        review_batcher.add(uuid.uuid4(), book.id, broken),
+        review_batcher.add(uuid.uuid4(), book.id, ReviewCreateRequest(review_text="fine", rating=2)),
+        return_exceptions=True,
+    )
+
+    assert [review.review_text for review in (results[0], results[2])] == ["good", "fine"]
+    assert isinstance(results[1], IntegrityError)
+    assert review_batcher.stats()["fallbacks"] == 1
+    stats = await BookStatsService().get_stats(book.id, db_session)
+    assert (stats.review_count, stats.rating_sum) == (2, 6)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    members = [uuid.uuid4() for _ in range(1000)]
+    for member in members:
+        bloom.add(member)
+
+    assert all(member in bloom for member in members)
+    false_positives = sum(uuid.uuid4() in bloom for _ in range(10_000))
+    assert false_positives < 300
+
+
+@pytest.mark.anyio
+async def test_review_post_checks_book_without_selecting_it(
+    db_session, api_client, sql_statements, fresh_book_id_filter, monkeypatch
+):
+    book = await add_book(db_session)
+    monkeypatch.setattr(fresh_book_id_filter, "confirm_misses", False)
+    await fresh_book_id_filter.build(db_session)
+    sql_statements.clear()
+
+    response = await api_client.post(f"{reviews_prefix}/book/{uuid.uuid4()}", json={"review_text": "?", "rating": 3})
+    assert response.status_code == 404
+    assert response.json()["error_code"] == "book_not_found"
+    assert sql_statements == []
+
+    response = await api_client.post(f"{reviews_prefix}/book/{book.id}", json={"review_text": "ok", "rating": 3})
+    assert response.status_code == 201
+    assert not any("FROM books" in statement for statement in sql_statements)
+
+
+@pytest.mark.anyio
+async def test_book_id_filter_learns_books_created_elsewhere(db_session, fresh_book_id_filter):
+    await fresh_book_id_filter.might_exist(uuid.uuid4(), db_session)
+    # Inserted behind the filter's back, as another worker would.
+    book = await add_book(db_session)
+
+    assert await fresh_book_id_filter.might_exist(book.id, db_session)
+    assert fresh_book_id_filter.stats()["confirmations"] == 1
+    assert book.id in fresh_book_id_filter._filter
+
+
+@pytest.mark.anyio
+async def test_book_id_filter_rebuilds_without_blocking_checks(
+    db_session, fresh_book_id_filter, sql_statements, monkeypatch
+):
+    book = await add_book(db_session)
+    fresh_book_id_filter.clear()
+
+    # Without a filter every check is a lookup, and the first build starts in the background.
+    assert await fresh_book_id_filter.might_exist(book.id, db_session)
+    await fresh_book_id_filter._rebuild
+    assert book.id in fresh_book_id_filter._filter
+
+    other = await add_book(db_session)
+    monkeypatch.setattr(fresh_book_id_filter, "confirm_misses", False)
+    monkeypatch.setattr(fresh_book_id_filter, "_built_at", time.monotonic() - fresh_book_id_filter.rebuild_seconds - 1)
+    sql_statements.clear()
+
+    # A stale filter still answers at once; the rebuild swaps in a new one when it is done.
+    assert not await fresh_book_id_filter.might_exist(other.id, db_session)
+    assert sql_statements == []
+    assert fresh_book_id_filter.stats()["rebuilding"]
+    await fresh_book_id_filter._rebuild
+    assert await fresh_book_id_filter.might_exist(other.id, db_session)
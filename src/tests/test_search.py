@@ -0,0 +1,43 @@
+import uuid
+import pytest
+from src.books.models import Book
+from src.books.search import InvertedIndex, book_search_index
+
+books_prefix = "/api/v1/books"
+
+
+def test_inverted_index_ranks_title_matches_first():
+    index = InvertedIndex()
+    dune, tide, other = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    index.add(dune, "Dune", "Frank Herbert", "Spice and sand worms")
+    index.add(tide, "Tide", "Someone", "A novel set on Dune beaches")
+    index.add(other, "Things fall apart", "Chinua Achebe", "History")
+
+    assert [book_id for book_id, _ in index.search("dune")] == [dune, tide]
+    assert [book_id for book_id, _ in index.search("dune spice")] == [dune]
+    assert index.search("missing") == []
+
+    index.remove(dune)
+    assert [book_id for book_id, _ in index.search("dune")] == [tide]
+
+
+@pytest.mark.anyio
+async def test_search_route_uses_in_process_fallback(db_session, api_client):
+    book_search_index.clear()
+    for title in ("Python basics", "Advanced python", "Cooking"):
+        db_session.add(Book(title=title, author="author", description="description"))
+    await db_session.commit()
+
+    response = await api_client.get(f"{books_prefix}/search", params={"q": "python", "limit": 1})
+    assert response.status_code == 200
+    first = response.json()
+    assert len(first["items"]) == 1
+
+    response = await api_client.get(
+        f"{books_prefix}/search", params={"q": "python", "limit": 1, "cursor": first["next_cursor"]}
+    )
+    second = response.json()
+    assert second["next_cursor"] is None
+    titles = {first["items"][0]["title"], second["items"][0]["title"]}
+    assert titles == {"Python basics", "Advanced python"}
+    book_search_index.clear()
@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from src.singleflight import SingleFlight
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    started = 0
+
+    async def fetch(value):
+        nonlocal started
+        started += 1
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    results = await asyncio.gather(*(flight.do("key", fetch, 21) for _ in range(10)))
+
+    assert results == [42] * 10
+    assert started == 1
+    assert flight.stats()["coalescing_ratio"] == 0.9
+    assert flight.stats()["in_flight"] == 0
+
+    await flight.do("key", fetch, 1)
+    assert started == 2
+
+
+@pytest.mark.anyio
+async def test_errors_reach_every_waiter_and_release_the_key():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+@pytest.mark.anyio
+async def test_cancelling_one_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("key", slow))
+    second = asyncio.ensure_future(flight.do("key", slow))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"